@@ -1,18 +1,99 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pymongo import MongoClient
 from dotenv import load_dotenv
-import os
 
 load_dotenv()
 MONGO_URL = os.getenv("MONGO_URL", "localhost")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 20))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 2000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 2000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 5000))
+MONGO_EXECUTOR_WORKERS = int(os.getenv("MONGO_EXECUTOR_WORKERS", 8))
+
+_clients = {}
+_clients_lock = threading.Lock()
+_clients_pid = os.getpid()
+_executor = None
+_executor_pid = None
+
+
+def get_mongo_client(url=MONGO_URL):
+    """Returns the process-wide `MongoClient` for `url`
+
+    Clients are created lazily (no socket is opened until the first operation)
+    and shared by every caller in the process. A forked child, e.g. a gunicorn
+    worker, gets its own clients instead of reusing the parent's sockets.
+    """
+
+    global _clients_pid
+
+    with _clients_lock:
+        if os.getpid() != _clients_pid:
+            # the parent's pools are not fork-safe, drop them without closing
+            _clients.clear()
+            _clients_pid = os.getpid()
+
+        client = _clients.get(url)
+        if client is None:
+            client = MongoClient(
+                url,
+                connect=False,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            )
+            _clients[url] = client
+
+        return client
+
+
+def set_mongo_client(client, url=MONGO_URL):
+    """Registers `client` as the process-wide client for `url`, e.g. a mongomock
+    client for tests and benchmarks
+    """
+
+    with _clients_lock:
+        _clients[url] = client
+
+
+def get_mongo_executor():
+    """Returns the process-wide thread pool that async code runs Mongo calls on
+
+    It is separate from the thread `sync_to_async` runs ORM calls on, so a slow
+    Mongo query only waits in this pool and never holds up Postgres work.
+    """
+
+    global _executor, _executor_pid
+
+    with _clients_lock:
+        if os.getpid() != _executor_pid:
+            # a forked child does not inherit the parent's worker threads
+            _executor = ThreadPoolExecutor(max_workers=MONGO_EXECUTOR_WORKERS, thread_name_prefix='mongo')
+            _executor_pid = os.getpid()
+
+        return _executor
+
+
+async def run_in_mongo_executor(func, *args, **kwargs):
+    """Awaits the blocking pymongo call `func(*args, **kwargs)` on the Mongo executor"""
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_mongo_executor(), partial(func, *args, **kwargs))
 
 
 class MongoConnection():
 
     def __init__(self, database='mongolog'):
-        client = MongoClient(MONGO_URL)
         self.database_name = database
 
-        self.db = client[self.database_name]
+    @property
+    def db(self):
+        return get_mongo_client()[self.database_name]
 
     def get_collection(self, name):
         return self.db[name]
@@ -0,0 +1,52 @@
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+
+from .creation import DatabaseCreation
+from .pool import get_pool
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    """`django.db.backends.postgresql` with a process-wide connection pool
+
+    Enabled by a `POOL` dict in the database settings (`MAX_SIZE`, `MAX_LIFETIME`,
+    `IDLE_TIMEOUT`, `HEALTH_CHECKS`, see `ConnectionPool`). Closing the connection,
+    at the end of each request with `CONN_MAX_AGE = 0`, gives it back to the pool
+    and the next request, on any thread, reuses it instead of opening a new one.
+    Without `POOL` it behaves like the stock backend.
+    """
+
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pooled_connection = None
+
+    @property
+    def pool_settings(self):
+        return self.settings_dict.get('POOL')
+
+    def get_new_connection(self, conn_params):
+
+        if self.pool_settings is None:
+            return super().get_new_connection(conn_params)
+
+        def connect():
+            connection = super(DatabaseWrapper, self).get_new_connection(conn_params)
+            return connection, self.isolation_level
+
+        pool = get_pool(self.alias, conn_params, self.pool_settings)
+        self.pooled_connection = pool.checkout(connect)
+        self.pool = pool
+        self.isolation_level = self.pooled_connection.isolation_level
+
+        return self.pooled_connection.connection
+
+    def _close(self):
+
+        # closed inside an atomic block the wrapper keeps its reference, the connection can not be shared
+        if self.pooled_connection is None or self.in_atomic_block:
+            self.pooled_connection = None
+            return super()._close()
+
+        pooled_connection, self.pooled_connection = self.pooled_connection, None
+        with self.wrap_database_errors:
+            self.pool.checkin(pooled_connection)
@@ -0,0 +1,12 @@
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgresDatabaseCreation
+
+from .pool import drain_pools
+
+
+class DatabaseCreation(PostgresDatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+
+        # idle pooled connections to the test database would block DROP DATABASE
+        drain_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from logger.metrics import DB_POOL_CHECKOUTS, DB_POOL_CONNECTIONS_CREATED, DB_POOL_EVICTIONS, DB_POOL_IDLE
+
+_pools = {}
+_pools_lock = threading.Lock()
+_pools_pid = os.getpid()
+
+
+class PooledConnection():
+
+    def __init__(self, connection, isolation_level):
+        self.connection = connection
+        self.isolation_level = isolation_level
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool():
+    """Idle Postgres connections shared by every thread of the process
+
+    Never blocks: a checkout with no usable idle connection opens a new one, and a
+    connection given back to a full pool is closed. Idle connections are evicted past
+    `max_lifetime` seconds since they were opened or `idle_timeout` seconds unused,
+    and with `health_checks` are probed with `SELECT 1` before being handed out.
+    """
+
+    def __init__(self, alias, max_size=10, max_lifetime=1800, idle_timeout=300, health_checks=True):
+        self.alias = alias
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.health_checks = health_checks
+
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def checkout(self, connect):
+        """Returns a reused `PooledConnection`, or a new one from `connect()` -> (connection, isolation_level)"""
+
+        while True:
+            with self._lock:
+                pooled = self._idle.pop() if self._idle else None
+                DB_POOL_IDLE.labels(self.alias).set(len(self._idle))
+
+            if pooled is None:
+                break
+
+            reason = self.eviction_reason(pooled)
+            if reason is None:
+                DB_POOL_CHECKOUTS.labels(self.alias, 'reused').inc()
+                return pooled
+
+            DB_POOL_EVICTIONS.labels(self.alias, reason).inc()
+            close_quietly(pooled.connection)
+
+        DB_POOL_CONNECTIONS_CREATED.labels(self.alias).inc()
+        DB_POOL_CHECKOUTS.labels(self.alias, 'new').inc()
+        return PooledConnection(*connect())
+
+    def checkin(self, pooled):
+        """Gives a connection back, it is closed when it is not reusable or the pool is full"""
+
+        connection = pooled.connection
+        if connection.closed:
+            return
+
+        if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Exception:
+                DB_POOL_EVICTIONS.labels(self.alias, 'broken').inc()
+                close_quietly(connection)
+                return
+
+        pooled.last_used = time.monotonic()
+
+        with self._lock:
+            if len(self._idle) < self.max_size and not self.expired(pooled):
+                self._idle.append(pooled)
+                DB_POOL_IDLE.labels(self.alias).set(len(self._idle))
+                return
+
+        DB_POOL_EVICTIONS.labels(self.alias, 'full' if not self.expired(pooled) else 'lifetime').inc()
+        close_quietly(connection)
+
+    def expired(self, pooled):
+        return self.max_lifetime is not None and time.monotonic() - pooled.created_at >= self.max_lifetime
+
+    def eviction_reason(self, pooled):
+
+        if pooled.connection.closed:
+            return 'broken'
+
+        if self.expired(pooled):
+            return 'lifetime'
+
+        if self.idle_timeout is not None and time.monotonic() - pooled.last_used >= self.idle_timeout:
+            return 'idle'
+
+        if self.health_checks:
+            try:
+                with pooled.connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+            except Exception:
+                return 'health_check'
+
+        return None
+
+    def drain(self):
+        """Closes every idle connection"""
+
+        with self._lock:
+            idle, self._idle = self._idle, []
+            DB_POOL_IDLE.labels(self.alias).set(0)
+
+        for pooled in idle:
+            close_quietly(pooled.connection)
+
+
+def close_quietly(connection):
+
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def get_pool(alias, conn_params, pool_settings):
+    """Returns the process-wide pool for an alias and its connection parameters
+
+    Keyed by the parameters too, so the connections to a test database are not
+    handed out for the real one. A forked child starts with empty pools.
+    """
+
+    global _pools_pid
+
+    key = (alias, tuple(sorted((name, str(value)) for name, value in conn_params.items())))
+
+    with _pools_lock:
+        if os.getpid() != _pools_pid:
+            # the parent's sockets must not be shared, drop them without closing
+            _pools.clear()
+            _pools_pid = os.getpid()
+
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(alias, **{name.lower(): value for name, value in pool_settings.items()})
+            _pools[key] = pool
+
+        return pool
+
+
+def drain_pools():
+    """Closes the idle connections of every pool, e.g. before dropping a database"""
+
+    with _pools_lock:
+        pools = list(_pools.values())
+
+    for pool in pools:
+        pool.drain()
@@ -0,0 +1,208 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from logger.metrics import DB_REPLICA_FALLBACKS, DB_REPLICA_LAG, DB_REPLICA_READS
+
+_replica_reads = ContextVar('replica_reads', default=None)
+
+_replica_status = {}
+_replica_status_lock = threading.Lock()
+
+# caches that are not shared between worker processes
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# seconds behind the primary, 0 when every received WAL record has been replayed
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def get_replica_settings():
+
+    return dict({
+        'REPLICAS': [],
+        'MAX_LAG_SECONDS': 5,
+        'HEALTH_CHECK_INTERVAL': 10,
+        'STICKY_SECONDS': 5,
+        'CACHE_ALIAS': 'default',
+    }, **getattr(settings, 'REPLICA_ROUTING', {}))
+
+
+class ReplicaReads():
+    """Reads of the current `use_replica` block, the replica is picked on the first query"""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._alias = None
+
+    @property
+    def alias(self):
+
+        if self._alias is None:
+            self._alias = choose_read_alias(self.user_id)
+        return self._alias
+
+
+@contextmanager
+def use_replica(user_id=None):
+    """Lets the reads of the block go to a replica, unless `user_id` wrote recently"""
+
+    token = _replica_reads.set(ReplicaReads(user_id))
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads(view_method):
+    """Runs an API view method, e.g. `get`, inside `use_replica` for the request user"""
+
+    @wraps(view_method)
+    def wrapped_view_method(self, request, *args, **kwargs):
+
+        with use_replica(request.user.id):
+            return view_method(self, request, *args, **kwargs)
+
+    return wrapped_view_method
+
+
+@checks.register(checks.Tags.caches)
+def check_sticky_cache(app_configs, **kwargs):
+    """Replicas need a cache shared by every worker, a write would otherwise only make
+    the reads of the worker that handled it sticky
+    """
+
+    replica_settings = get_replica_settings()
+    if not replica_settings['REPLICAS']:
+        return []
+
+    cache_alias = replica_settings['CACHE_ALIAS']
+    backend = settings.CACHES.get(cache_alias, {}).get('BACKEND')
+    if backend is None or backend in LOCAL_CACHE_BACKENDS:
+        return [checks.Error(
+            f"REPLICA_ROUTING['CACHE_ALIAS'] ({cache_alias!r}) must be a cache shared by every worker, "
+            f"not {backend}",
+            hint='Set CACHE_LOCATION to a memcached server, or drop the read replicas.',
+            id='db_clients.E001',
+        )]
+
+    return []
+
+
+def make_sticky_key(user_id):
+    return f"replica-sticky:{user_id}"
+
+
+def mark_sticky(user_id):
+    """Sends the reads of `user_id` to the primary for `STICKY_SECONDS`, so they see their own writes"""
+
+    replica_settings = get_replica_settings()
+    if replica_settings['REPLICAS'] and user_id is not None:
+        caches[replica_settings['CACHE_ALIAS']].set(make_sticky_key(user_id), True, replica_settings['STICKY_SECONDS'])
+
+
+def choose_read_alias(user_id):
+    """A healthy replica lagging less than `MAX_LAG_SECONDS`, the primary otherwise"""
+
+    replica_settings = get_replica_settings()
+    if not replica_settings['REPLICAS']:
+        return DEFAULT_DB_ALIAS
+
+    if user_id is not None and caches[replica_settings['CACHE_ALIAS']].get(make_sticky_key(user_id)):
+        DB_REPLICA_FALLBACKS.labels('sticky').inc()
+        return DEFAULT_DB_ALIAS
+
+    healthy = []
+    for alias in replica_settings['REPLICAS']:
+        lag = get_replica_lag(alias, replica_settings['HEALTH_CHECK_INTERVAL'])
+        if lag is not None and lag <= replica_settings['MAX_LAG_SECONDS']:
+            healthy.append(alias)
+
+    if not healthy:
+        DB_REPLICA_FALLBACKS.labels('unhealthy').inc()
+        return DEFAULT_DB_ALIAS
+
+    return random.choice(healthy)
+
+
+def get_replica_lag(alias, interval):
+    """Replication lag of a replica in seconds, None if it is unreachable
+
+    Measured at most once per `interval` seconds per process.
+    """
+
+    with _replica_status_lock:
+        status = _replica_status.get(alias)
+
+    if status is not None and time.monotonic() - status[0] < interval:
+        return status[1]
+
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(REPLICA_LAG_SQL)
+            lag = float(cursor.fetchone()[0])
+    except Exception:
+        connections[alias].close()
+        lag = None
+
+    DB_REPLICA_LAG.labels(alias).set(lag if lag is not None else -1)
+    with _replica_status_lock:
+        _replica_status[alias] = (time.monotonic(), lag)
+
+    return lag
+
+
+class ReplicaRouter():
+    """Routes the reads of `use_replica` blocks to replicas, everything else to the primary
+
+    Replicas are the `REPLICA_ROUTING['REPLICAS']` database aliases.
+    """
+
+    def db_for_read(self, model, **hints):
+
+        replica_reads = _replica_reads.get()
+        if replica_reads is None:
+            return DEFAULT_DB_ALIAS
+
+        # a transaction on the primary must read its own writes
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            DB_REPLICA_FALLBACKS.labels('transaction').inc()
+            return DEFAULT_DB_ALIAS
+
+        alias = replica_reads.alias
+        if alias != DEFAULT_DB_ALIAS:
+            DB_REPLICA_READS.labels(alias).inc()
+
+        return alias
+
+    def db_for_write(self, model, **hints):
+
+        # not None, Django would fall back to the database an instance was read from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+
+        if db in get_replica_settings()['REPLICAS']:
+            return False
+
+        return None
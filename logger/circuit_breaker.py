@@ -0,0 +1,57 @@
+import threading
+import time
+
+
+class CircuitBreaker():
+    """Stops calling a failing dependency for a while instead of paying its timeout on every call
+
+    Closed: calls are allowed. After `failure_threshold` consecutive failures the
+    breaker opens and `allow` returns False for `reset_timeout` seconds. Then one
+    trial call is let through (half-open), its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may be attempted now"""
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # a single trial call, concurrent callers keep failing fast
+                self.state = self.HALF_OPEN
+                return True
+
+            return False
+
+    def record_success(self):
+
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    @property
+    def is_open(self):
+        return self.state != self.CLOSED
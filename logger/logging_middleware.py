@@ -1,42 +1,305 @@
 import logging
 import os
+import queue
+import threading
 import time
+from datetime import datetime
 from time import gmtime, strftime
-from dotenv import load_dotenv
-from pymongo import MongoClient
 
-load_dotenv()
+from pymongo.errors import BulkWriteError
+from db_clients.mongodb import MongoConnection
+from .circuit_breaker import CircuitBreaker
+from .metrics import LOG_BATCH_SIZE, LOG_CIRCUIT_OPEN, LOG_DROPPED_RECORDS, LOG_QUEUE_DEPTH, LOG_RECORDS, \
+    LOG_REPLAYED_RECORDS, LOG_SPILLED_RECORDS, LOG_SPOOL_BYTES, LOG_WRITE_FAILURES
+from .profiling import timed
+from .spool import DiskSpool
 
-MONGO_URL = os.getenv("MONGO_URL", "localhost")
+# errors of the handlers themselves go to the console, never back to a Mongo handler
+logger = logging.getLogger("django")
+
+DUPLICATE_KEY_ERROR = 11000
 
 
 class AuditLoggingHandler(logging.Handler):
+    """Stores log records in Mongo
+
+    By default every record is written synchronously with `insert_one`. With
+    `asynchronous=True` records are queued and a background worker writes them
+    with `insert_many` once `batch_size` records are waiting or `flush_interval`
+    seconds have passed. When the queue is full `overflow_policy` decides what
+    happens to new records:
+
+    - `block`: wait for room in the queue
+    - `drop_oldest`: discard the oldest queued record
+    - `spill`: append the record to the disk spool
+
+    With `spool_dir` set, records that can not be written to Mongo are appended to a
+    local `DiskSpool` instead of being lost. A circuit breaker opens after
+    `failure_threshold` failed writes, then records go straight to the spool for
+    `reset_timeout` seconds instead of waiting for the server selection timeout.
+    A background replayer ships the spooled segments in bulk once Mongo is back.
+    """
 
     log_type = "audit"
 
-    def __init__(self, database, collection="mongolog"):
+    OVERFLOW_BLOCK = 'block'
+    OVERFLOW_DROP_OLDEST = 'drop_oldest'
+    OVERFLOW_SPILL = 'spill'
+
+    OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL)
+
+    def __init__(self, database, collection="mongolog", asynchronous=False, batch_size=100,
+                 flush_interval=1.0, max_queue_size=10000, overflow_policy=OVERFLOW_BLOCK, spool_dir=None,
+                 segment_max_bytes=16 * 1024 * 1024, failure_threshold=3, reset_timeout=30.0, replay_interval=5.0):
         logging.Handler.__init__(self)
-        self.client = MongoClient(MONGO_URL)
+        self.connection = MongoConnection(database)
+        self.collection_name = collection
 
-        self.db = self.client[database]
-        self.collection = self.db[collection]
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid overflow policy {overflow_policy}")
+        if overflow_policy == self.OVERFLOW_SPILL and spool_dir is None:
+            raise ValueError("`spool_dir` is required for the spill overflow policy")
 
-    def emit(self, record):
-        """save log record in file or database"""
+        self.asynchronous = asynchronous
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.max_queue_size = max_queue_size
+        self.replay_interval = replay_interval
+
+        self.dropped_records = 0
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.spool = DiskSpool(spool_dir, self.log_type, segment_max_bytes) if spool_dir is not None else None
+        self._queue = None
+        self._worker = None
+        self._replayer = None
+
+        if self.asynchronous:
+            self._start_worker()
+            # threads do not survive a fork, e.g. gunicorn pre-fork workers
+            os.register_at_fork(after_in_child=self._start_worker)
+
+        if self.spool is not None:
+            self._start_replayer()
+            os.register_at_fork(after_in_child=self._start_replayer)
+
+    @property
+    def collection(self):
+        # resolved on every use so a forked process picks up its own client
+        return self.connection.get_collection(self.collection_name)
+
+    def _start_worker(self):
+
+        # records inherited over a fork are still shipped by the parent
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._stop_event = threading.Event()
+        self._worker = threading.Thread(
+            target=self._drain, name=f"{self.log_type}-log-shipper", daemon=True)
+        self._worker.start()
+
+    def _start_replayer(self):
+
+        self._replayer_stop_event = threading.Event()
+        self._replayer = threading.Thread(
+            target=self._replay, name=f"{self.log_type}-log-replayer", daemon=True)
+        self._replayer.start()
+
+    def build_record(self, record):
+        """Builds the Mongo document for a log record"""
         formatted_message = self.format(record)
 
-        database_record = {
+        return {
             "level": record.levelname,
             "type": self.log_type,
             "module": record.module,
             "asctime": record.asctime if getattr(record, "asctime", None) else strftime("%Y-%m-%d %H:%M:%S", gmtime()),
+            "ts": datetime.utcfromtimestamp(record.created),  # stored as a BSON date, indexed
             "message": record.message  # use `formatted_message` for store formatted log
         }
 
+    def emit(self, record):
+        """save log record in file or database"""
+        with timed('log'):
+            database_record = self.build_record(record)
+            LOG_RECORDS.labels(self.log_type).inc()
+
+            if self.asynchronous:
+                self._enqueue(database_record)
+                return
+
+            self._write_batch([database_record])
+
+    def _enqueue(self, database_record):
+
+        if self.overflow_policy == self.OVERFLOW_BLOCK:
+            self._queue.put(database_record)
+            return
+
+        try:
+            self._queue.put_nowait(database_record)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow_policy == self.OVERFLOW_SPILL:
+            self._spill([database_record])
+            return
+
+        # OVERFLOW_DROP_OLDEST
+        try:
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self.dropped_records += 1
+            LOG_DROPPED_RECORDS.labels(self.log_type).inc()
+        except queue.Empty:
+            pass
+
+        try:
+            self._queue.put_nowait(database_record)
+        except queue.Full:
+            self.dropped_records += 1
+            LOG_DROPPED_RECORDS.labels(self.log_type).inc()
+
+    def _drain(self):
+        """Worker loop, ships queued records in size or time bounded batches"""
+
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            LOG_QUEUE_DEPTH.labels(self.log_type).set(self._queue.qsize())
+            LOG_BATCH_SIZE.labels(self.log_type).observe(len(batch))
+
+            self._write_batch(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_batch(self, batch):
+
+        if not self.circuit_breaker.allow():
+            self._spill(batch)
+            return
+
         try:
-            self.collection.insert_one(database_record)
+            self._insert(batch)
         except Exception as e:
-            print(e)
+            LOG_WRITE_FAILURES.labels(self.log_type).inc()
+            self._record_failure()
+            logger.error(f"Failed to write {len(batch)} {self.log_type} log records: {e}")
+            self._spill(batch)
+            return
+
+        self._record_success()
+
+    def _insert(self, batch):
+        """Inserts a batch, records already written by an earlier attempt are skipped"""
+
+        try:
+            self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            if any(error['code'] != DUPLICATE_KEY_ERROR for error in e.details['writeErrors']) \
+                    or e.details.get('writeConcernErrors'):
+                raise
+
+    def _record_success(self):
+
+        self.circuit_breaker.record_success()
+        LOG_CIRCUIT_OPEN.labels(self.log_type).set(0)
+
+    def _record_failure(self):
+
+        self.circuit_breaker.record_failure()
+        LOG_CIRCUIT_OPEN.labels(self.log_type).set(int(self.circuit_breaker.is_open))
+
+    def _spill(self, database_records):
+        """Appends records Mongo did not take to the spool, they are lost without one"""
+
+        if self.spool is not None:
+            try:
+                self.spool.append(database_records)
+                LOG_SPILLED_RECORDS.labels(self.log_type).inc(len(database_records))
+                return
+            except Exception as e:
+                logger.error(f"Failed to spool {len(database_records)} {self.log_type} log records: {e}")
+
+        self.dropped_records += len(database_records)
+        LOG_DROPPED_RECORDS.labels(self.log_type).inc(len(database_records))
+
+    def _replay(self):
+        """Replayer loop, ships spooled segments oldest first while Mongo accepts writes"""
+
+        self.spool.recover()
+
+        while not self._replayer_stop_event.wait(self.replay_interval):
+            self.replay_spool()
+
+    def replay_spool(self):
+        """Ships every closed spool segment, stops at the first failure
+
+        :return: number of records replayed
+        """
+
+        self.spool.rotate()
+        replayed = 0
+
+        for segment in self.spool.segments():
+            if self._replayer_stop_event.is_set() or not self.circuit_breaker.allow():
+                break
+
+            claimed = self.spool.claim(segment)
+            if claimed is None:
+                continue
+
+            database_records = self.spool.read(claimed)
+            try:
+                for offset in range(0, len(database_records), self.batch_size):
+                    self._insert(database_records[offset:offset + self.batch_size])
+            except Exception as e:
+                self.spool.release(claimed)
+                self._record_failure()
+                logger.error(f"Failed to replay the {self.log_type} log spool segment {claimed}: {e}")
+                break
+
+            os.remove(claimed)
+            self._record_success()
+            replayed += len(database_records)
+            LOG_REPLAYED_RECORDS.labels(self.log_type).inc(len(database_records))
+
+        LOG_SPOOL_BYTES.labels(self.log_type).set(self.spool.size())
+        return replayed
+
+    def flush(self):
+        """Blocks until every queued record has been shipped"""
+
+        if self.asynchronous and self._worker.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Ships the remaining records and stops the worker, called by `logging.shutdown` at exit"""
+
+        if self.asynchronous and self._worker.is_alive():
+            self._stop_event.set()
+            self._worker.join()
+
+        if self.spool is not None:
+            if self._replayer.is_alive():
+                self._replayer_stop_event.set()
+                self._replayer.join()
+            self.spool.close()
+
+        logging.Handler.close(self)
 
 
 class AccessLoggingHandler(AuditLoggingHandler):
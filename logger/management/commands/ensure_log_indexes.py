@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from logger.models import MongoLogsClient
+
+
+class Command(BaseCommand):
+    """Creates or upgrades the Mongo logs indexes and retention policy, safe to run on every deploy
+    """
+
+    help = 'Creates or upgrades the Mongo logs collection indexes and retention policy'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--backfill', action='store_true',
+                            help='Set `ts` on logs written before it was stored')
+
+    def handle(self, *args, **options):
+
+        actions = MongoLogsClient().ensure_schema(backfill=options['backfill'])
+
+        for action in actions:
+            self.stdout.write(action)
+
+        if not actions:
+            self.stdout.write('logs collection is up to date')
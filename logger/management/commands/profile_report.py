@@ -0,0 +1,39 @@
+import glob
+import io
+import os
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+
+from logger.profiling import get_profiling_settings
+
+
+class Command(BaseCommand):
+    """Aggregates the cProfile samples dumped by `ProfilingMiddleware` into a top-N report
+    """
+
+    help = 'Prints the hottest functions across the sampled request profiles'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--dump-dir', default=get_profiling_settings()['DUMP_DIR'])
+        parser.add_argument('--url-name', help='Only aggregate samples of this URL name')
+        parser.add_argument('--top', type=int, default=30)
+        parser.add_argument('--sort', default='cumulative', choices=['cumulative', 'tottime', 'ncalls'])
+
+    def handle(self, *args, **options):
+
+        if not options['dump_dir'] or not os.path.isdir(options['dump_dir']):
+            raise CommandError('No profile dump directory, set PROFILING["DUMP_DIR"] or --dump-dir')
+
+        pattern = f"*-{options['url_name']}.prof" if options['url_name'] else '*.prof'
+        dumps = sorted(glob.glob(os.path.join(options['dump_dir'], pattern)))
+        if not dumps:
+            raise CommandError('No profile samples found')
+
+        self.stdout.write(f'Aggregating {len(dumps)} samples')
+
+        report = io.StringIO()
+        stats = pstats.Stats(*dumps, stream=report)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['top'])
+        self.stdout.write(report.getvalue())
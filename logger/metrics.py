@@ -0,0 +1,158 @@
+import asyncio
+import ipaddress
+import os
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, \
+    REGISTRY, generate_latest, multiprocess
+
+# with several gunicorn workers, point `prometheus_multiproc_dir` to a shared directory
+# cleaned on deploy, every worker then writes its samples to memory-mapped files in it
+MULTIPROCESS = bool(os.getenv('prometheus_multiproc_dir') or os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+
+REQUESTS = Counter(
+    'api_requests_total', 'API requests', ['view', 'method', 'status'])
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds', 'API request latency', ['view', 'method'])
+REQUEST_QUERIES = Histogram(
+    'api_request_db_queries', 'SQL queries per API request', ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100))
+
+LOG_RECORDS = Counter(
+    'log_records_total', 'Log records handed to the Mongo log handlers', ['type'])
+LOG_WRITE_FAILURES = Counter(
+    'log_write_failures_total', 'Failed Mongo log writes', ['type'])
+LOG_DROPPED_RECORDS = Counter(
+    'log_dropped_records_total', 'Log records dropped by a full queue', ['type'])
+LOG_SPILLED_RECORDS = Counter(
+    'log_spilled_records_total', 'Log records spilled to the local disk spool', ['type'])
+LOG_REPLAYED_RECORDS = Counter(
+    'log_replayed_records_total', 'Spooled log records shipped to Mongo', ['type'])
+LOG_SPOOL_BYTES = Gauge(
+    'log_spool_bytes', 'Bytes of log records waiting in the local disk spool', ['type'], multiprocess_mode='max')
+LOG_CIRCUIT_OPEN = Gauge(
+    'log_circuit_open', 'Whether Mongo log writes are short-circuited to the spool', ['type'],
+    multiprocess_mode='max')
+LOG_BATCH_SIZE = Histogram(
+    'log_batch_size', 'Records per Mongo log batch', ['type'],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000))
+LOG_QUEUE_DEPTH = Gauge(
+    'log_queue_depth', 'Log records waiting to be shipped', ['type'], multiprocess_mode='livesum')
+
+DB_POOL_CONNECTIONS_CREATED = Counter(
+    'db_pool_connections_created_total', 'Postgres connections opened by the pool', ['alias'])
+DB_POOL_CHECKOUTS = Counter(
+    'db_pool_checkouts_total', 'Postgres connections handed out by the pool', ['alias', 'source'])
+DB_POOL_EVICTIONS = Counter(
+    'db_pool_evictions_total', 'Pooled Postgres connections closed', ['alias', 'reason'])
+DB_POOL_IDLE = Gauge(
+    'db_pool_idle_connections', 'Idle Postgres connections in the pool', ['alias'], multiprocess_mode='livesum')
+
+DB_REPLICA_READS = Counter(
+    'db_replica_reads_total', 'Queries routed to a read replica', ['alias'])
+DB_REPLICA_FALLBACKS = Counter(
+    'db_replica_fallbacks_total', 'Replica eligible reads sent to the primary', ['reason'])
+DB_REPLICA_LAG = Gauge(
+    'db_replica_lag_seconds', 'Last measured replication lag, -1 when unreachable', ['alias'],
+    multiprocess_mode='max')
+
+TWEET_CACHE_LOOKUPS = Counter(
+    'tweet_cache_lookups_total', 'Single tweet cache lookups', ['result'])
+
+
+class MetricsMiddleware():
+    """Counts requests and records their latency and SQL query count, labeled by URL name
+
+    Async capable, so ASGI requests to async views are not moved to a thread. Their
+    queries run in `sync_to_async` threads and are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+        if asyncio.iscoroutinefunction(get_response):
+            # tells the handler to await this middleware
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        query_count = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal query_count
+            query_count += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+
+        self.observe(request, response, time.perf_counter() - start, query_count)
+        return response
+
+    async def __acall__(self, request):
+
+        start = time.perf_counter()
+        response = await self.get_response(request)
+
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    def observe(self, request, response, duration, query_count=None):
+
+        view = request.resolver_match.url_name if request.resolver_match else 'unresolved'
+        REQUESTS.labels(view, request.method, response.status_code).inc()
+        REQUEST_LATENCY.labels(view, request.method).observe(duration)
+        if query_count is not None:
+            REQUEST_QUERIES.labels(view).observe(query_count)
+
+
+def get_metrics_settings():
+
+    return dict({
+        'ALLOWED_NETWORKS': ['127.0.0.0/8', '::1/128'],
+    }, **getattr(settings, 'METRICS', {}))
+
+
+def is_allowed_client(remote_addr, allowed_networks):
+
+    try:
+        address = ipaddress.ip_address(remote_addr)
+    except ValueError:
+        return False
+
+    return any(address in ipaddress.ip_network(network) for network in allowed_networks)
+
+
+def metrics(request):
+    """Prometheus text exposition of the metrics of every worker
+
+    Only answers clients in `METRICS['ALLOWED_NETWORKS']`.
+    """
+
+    if not is_allowed_client(request.META.get('REMOTE_ADDR', ''), get_metrics_settings()['ALLOWED_NETWORKS']):
+        return HttpResponseForbidden()
+
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def get_registry():
+    """The registry holding the samples of every worker, collected from the
+    `prometheus_multiproc_dir` files in multiprocess mode
+    """
+
+    if not MULTIPROCESS:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
@@ -1,8 +1,47 @@
+import base64
+from datetime import datetime, timedelta
 from enum import Enum
-from db_clients.mongodb import MongoConnection
+from bson import ObjectId
+from django.conf import settings
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from db_clients.mongodb import MongoConnection, run_in_mongo_executor
 
 MONGO_LOGS_COLLECTION = 'logs'
 
+DEFAULT_LOGS_PAGE_SIZE = 100
+MAX_LOGS_PAGE_SIZE = 1000
+LOGS_STREAM_BATCH_SIZE = 500
+LOGS_BACKFILL_BATCH_SIZE = 1000
+
+LOGS_TTL_INDEX = 'logs_ts_ttl'
+
+# every listing sorts on (ts, _id) newest first, optionally filtered by `type`
+LOGS_INDEXES = {
+    'logs_ts_id': [('ts', DESCENDING), ('_id', DESCENDING)],
+    'logs_type_ts_id': [('type', ASCENDING), ('ts', DESCENDING), ('_id', DESCENDING)],
+}
+
+
+def encode_logs_cursor(ts, log_id):
+    """Builds an opaque cursor from a `(ts, _id)` keyset position, `ts` is None for logs without one"""
+
+    raw = f"{ts.isoformat() if ts is not None else ''}|{log_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_logs_cursor(cursor):
+    """Decodes an opaque cursor into a `(ts, _id)` keyset position
+
+    :raises: ValueError if the cursor is malformed
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        ts, log_id = raw.split('|')
+        return datetime.fromisoformat(ts) if ts else None, ObjectId(log_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
 
 class MongoLogsClient():
 
@@ -16,20 +55,173 @@ class MongoLogsClient():
         def has_value(cls, value):
             return value in cls._value2member_map_
 
-    def __init__(self, client=MongoConnection()):
-        self.client = client
+    LOG_PROJECTION = {'type': 1, 'level': 1, 'module': 1, 'message': 1, 'asctime': 1, 'ts': 1}
+
+    def __init__(self, client=None):
+        self.client = client if client is not None else MongoConnection()
+
+    def build_query(self, log_type=None, module=None, level=None, start_date=None, end_date=None, cursor=None):
+        """Builds a Mongo filter for logs, pagination is done on `(ts, _id)` newest first
+
+        Logs written before `ts` was stored (until `ensure_log_indexes --backfill` ran)
+        sort after every other log and are paginated on `_id` alone.
+
+        :param cursor: opaque cursor returned with the previous page
+        :type cursor: str
+        :raises: ValueError if the log type or cursor is invalid
+        """
+
+        query = {}
+
+        if log_type is not None:
+            if self.LogType.has_value(log_type) is False:
+                raise ValueError("Invalid log type")
+            query['type'] = log_type
+
+        if module is not None:
+            query['module'] = module
+
+        if level is not None:
+            query['level'] = level.upper()
+
+        ts_range = {}
+        if start_date is not None:
+            ts_range['$gte'] = start_date
+        if end_date is not None:
+            ts_range['$lte'] = end_date
+        if ts_range:
+            query['ts'] = ts_range
+
+        if cursor is not None:
+            ts, log_id = decode_logs_cursor(cursor)
+            # `None` matches logs without `ts`, which range comparisons never match
+            query['$or'] = [{'ts': None, '_id': {'$lt': log_id}}]
+            if ts is not None:
+                query['$or'] = [
+                    {'ts': {'$lt': ts}},
+                    {'ts': ts, '_id': {'$lt': log_id}},
+                    {'ts': None},
+                ]
+
+        return query
+
+    def get_logs_page(self, limit=DEFAULT_LOGS_PAGE_SIZE, **filters):
+        """Returns one page of logs, newest first
+
+        :type limit: int
+        :return: (list of logs, next cursor or None)
+        :raises: ValueError if a filter is invalid
+        """
+
+        query = self.build_query(**filters)
+        limit = min(limit, MAX_LOGS_PAGE_SIZE)
+
+        conn = self.client.get_collection(MONGO_LOGS_COLLECTION)
+        logs = list(conn.find(query, self.LOG_PROJECTION)
+                    .sort([('ts', DESCENDING), ('_id', DESCENDING)]).limit(limit + 1))
+
+        next_cursor = None
+        if len(logs) > limit:
+            last_log = logs[limit - 1]
+            next_cursor = encode_logs_cursor(last_log.get('ts'), last_log['_id'])
+
+        logs = logs[:limit]
+        for log in logs:
+            del log['_id']
+
+        return logs, next_cursor
 
-    def get_logs(self, log_type=None):
-        """Returns all logs
-        :return: JSON
+    async def aget_logs_page(self, limit=DEFAULT_LOGS_PAGE_SIZE, **filters):
+        """`get_logs_page` for async views, run on the Mongo executor
+
+        :raises: ValueError if a filter is invalid
         """
 
-        if log_type is None:
-            conn = self.client.get_collection(MONGO_LOGS_COLLECTION)
-            return list(conn.find({}, {'_id': 0, 'type': 1, 'message': 1, 'asctime': 1}).sort('$natural', -1))
+        return await run_in_mongo_executor(self.get_logs_page, limit=limit, **filters)
+
+    def iter_logs(self, **filters):
+        """Iterates over every matching log, newest first, without loading them all in memory
+
+        :raises: ValueError if a filter is invalid
+        """
 
-        if self.LogType.has_value(log_type) is False:
-            raise Exception("Invalid log type")
+        query = self.build_query(**filters)
+        projection = dict(self.LOG_PROJECTION, _id=0)
 
         conn = self.client.get_collection(MONGO_LOGS_COLLECTION)
-        return list(conn.find({"type": log_type}, {'_id': 0, 'message': 1, 'asctime': 1}).sort('$natural', -1))
+        return (conn.find(query, projection)
+                .sort([('ts', DESCENDING), ('_id', DESCENDING)]).batch_size(LOGS_STREAM_BATCH_SIZE))
+
+    def backfill_ts(self, conn):
+        """Sets `ts` to the `_id` generation time on logs without one, one bulk write per batch
+
+        :return: number of logs updated
+        """
+
+        updated = 0
+        batch = []
+        for log in conn.find({'ts': {'$exists': False}}, {'_id': 1}).batch_size(LOGS_BACKFILL_BATCH_SIZE):
+            batch.append(UpdateOne({'_id': log['_id']}, {'$set': {'ts': log['_id'].generation_time}}))
+            if len(batch) == LOGS_BACKFILL_BATCH_SIZE:
+                updated += conn.bulk_write(batch, ordered=False).modified_count
+                batch = []
+
+        if batch:
+            updated += conn.bulk_write(batch, ordered=False).modified_count
+
+        return updated
+
+    def ensure_schema(self, backfill=False):
+        """Creates or upgrades the logs collection indexes and retention policy, idempotently
+
+        Retention is read from `settings.MONGO_LOGS_RETENTION`: a `ttl_days` TTL
+        on `ts`, or a `capped_size_bytes` capped collection. The two are exclusive.
+
+        :param backfill: set `ts` from the `_id` timestamp on logs written before it existed
+        :return: list of the actions taken
+        """
+
+        retention = getattr(settings, 'MONGO_LOGS_RETENTION', {})
+        ttl_days = retention.get('ttl_days')
+        capped_size_bytes = retention.get('capped_size_bytes')
+
+        if ttl_days and capped_size_bytes:
+            raise ValueError("A TTL and a capped collection can not be combined")
+
+        db = self.client.db
+        conn = db[MONGO_LOGS_COLLECTION]
+        actions = []
+
+        if capped_size_bytes:
+            if MONGO_LOGS_COLLECTION not in db.list_collection_names():
+                db.create_collection(MONGO_LOGS_COLLECTION, capped=True, size=capped_size_bytes)
+                actions.append(f"created capped collection ({capped_size_bytes} bytes)")
+            elif not conn.options().get('capped'):
+                db.command('convertToCapped', MONGO_LOGS_COLLECTION, size=capped_size_bytes)
+                actions.append(f"converted to capped collection ({capped_size_bytes} bytes)")
+
+        if backfill:
+            actions.append(f"backfilled ts on {self.backfill_ts(conn)} logs")
+
+        existing_indexes = conn.index_information()
+
+        for name, keys in LOGS_INDEXES.items():
+            if name not in existing_indexes:
+                conn.create_index(keys, name=name)
+                actions.append(f"created index {name}")
+
+        ttl_index = existing_indexes.get(LOGS_TTL_INDEX)
+        if ttl_days:
+            expire_after_seconds = int(timedelta(days=ttl_days).total_seconds())
+            if ttl_index is None:
+                conn.create_index([('ts', ASCENDING)], name=LOGS_TTL_INDEX, expireAfterSeconds=expire_after_seconds)
+                actions.append(f"created index {LOGS_TTL_INDEX}")
+            elif ttl_index.get('expireAfterSeconds') != expire_after_seconds:
+                db.command('collMod', MONGO_LOGS_COLLECTION, index={
+                    'name': LOGS_TTL_INDEX, 'expireAfterSeconds': expire_after_seconds})
+                actions.append(f"updated {LOGS_TTL_INDEX} to {ttl_days} days")
+        elif ttl_index is not None:
+            conn.drop_index(LOGS_TTL_INDEX)
+            actions.append(f"dropped index {LOGS_TTL_INDEX}")
+
+        return actions
@@ -0,0 +1,146 @@
+import cProfile
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+
+_request_timings = ContextVar('request_timings', default=None)
+
+# phases reported in the `Server-Timing` header, in order
+PHASES = ('auth', 'view', 'db', 'log', 'serialize', 'render')
+
+
+def get_profiling_settings():
+
+    return dict({
+        'ENABLED': False,
+        'SAMPLE_RATE': 0.0,
+        'DUMP_DIR': None,
+    }, **getattr(settings, 'PROFILING', {}))
+
+
+class RequestTimings():
+    """Accumulated time (ms) and counts per phase for the current request"""
+
+    def __init__(self):
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.query_count = 0
+        self.view_start = None
+
+    def add(self, phase, duration):
+        self.durations[phase] += duration * 1000
+
+    def end_view(self):
+
+        if self.view_start is not None:
+            self.add('view', time.perf_counter() - self.view_start)
+            self.view_start = None
+
+    def server_timing(self, total):
+
+        entries = [f'{phase};dur={duration:.2f}' for phase, duration in self.durations.items()]
+        entries.append(f'queries;desc="{self.query_count} queries"')
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+
+@contextmanager
+def timed(phase):
+    """Adds the time spent in the block to `phase` of the current request, a no-op outside profiled requests"""
+
+    timings = _request_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - start)
+
+
+def _time_query(execute, sql, params, many, context):
+
+    timings = _request_timings.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if timings is not None:
+            timings.add('db', time.perf_counter() - start)
+            timings.query_count += 1
+
+
+class ProfilingMiddleware():
+    """Records per-phase timings of each request in a `Server-Timing` header and
+    dumps a cProfile of a sampled fraction of requests to `PROFILING['DUMP_DIR']`
+
+    Opt-in with `PROFILING['ENABLED']`, otherwise removed from the stack at startup.
+    """
+
+    def __init__(self, get_response):
+
+        profiling_settings = get_profiling_settings()
+        if not profiling_settings['ENABLED']:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.sample_rate = profiling_settings['SAMPLE_RATE']
+        self.dump_dir = profiling_settings['DUMP_DIR']
+
+        if self.dump_dir is not None:
+            os.makedirs(self.dump_dir, exist_ok=True)
+
+    def __call__(self, request):
+
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+
+        profiler = None
+        if self.dump_dir is not None and random.random() < self.sample_rate:
+            profiler = cProfile.Profile()
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(_time_query):
+                if profiler is not None:
+                    response = profiler.runcall(self.get_response, request)
+                else:
+                    response = self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+
+        timings.end_view()
+        response['Server-Timing'] = timings.server_timing(time.perf_counter() - start)
+
+        if profiler is not None:
+            self.dump(profiler, request)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+
+        _request_timings.get().view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+
+        # DRF responses are rendered right after this hook, which runs as the view returns
+        timings = _request_timings.get()
+        timings.end_view()
+        start = time.perf_counter()
+        response.add_post_render_callback(lambda rendered: timings.add('render', time.perf_counter() - start))
+
+        return response
+
+    def dump(self, profiler, request):
+
+        url_name = request.resolver_match.url_name if request.resolver_match else 'unresolved'
+        file_name = f"{timezone.now().strftime('%Y%m%dT%H%M%S%f')}-{os.getpid()}-{url_name}.prof"
+        profiler.dump_stats(os.path.join(self.dump_dir, file_name))
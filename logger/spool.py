@@ -0,0 +1,155 @@
+import glob
+import os
+import threading
+import time
+from datetime import datetime
+
+import orjson
+from bson import ObjectId
+
+SEGMENT_SUFFIX = '.ndjson'
+CLAIMED_SUFFIX = '.replaying'
+
+
+def encode_record(database_record):
+    """One spool line, `_id` is kept so a replay that is retried can not insert a record twice"""
+
+    database_record = dict(database_record)
+    database_record['_id'] = str(database_record.get('_id') or ObjectId())
+    return orjson.dumps(database_record, default=str) + b'\n'
+
+
+def decode_record(line):
+
+    database_record = orjson.loads(line)
+    database_record['_id'] = ObjectId(database_record['_id'])
+    if 'ts' in database_record:
+        database_record['ts'] = datetime.fromisoformat(database_record['ts'])
+    return database_record
+
+
+class DiskSpool():
+    """Append-only, segment rotated local spool of log records
+
+    Each process appends to its own segment `<prefix>-<pid>-<time_ns>.ndjson` in
+    `directory` and starts a new one past `segment_max_bytes`. Closed segments are
+    claimed with an atomic rename by a single replayer, so several workers can
+    share the directory.
+    """
+
+    def __init__(self, directory, prefix, segment_max_bytes=16 * 1024 * 1024, fsync=False):
+        self.directory = directory
+        self.prefix = prefix
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+
+        self._file = None
+        self._file_pid = None
+        self._lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def append(self, database_records):
+        """Appends records to the current segment with a single buffered write"""
+
+        data = b''.join(encode_record(database_record) for database_record in database_records)
+
+        with self._lock:
+            if self._file is None or self._file_pid != os.getpid():
+                # a forked child writes its own segments, the parent's file object is left alone
+                self._open_segment()
+
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+            if self._file.tell() >= self.segment_max_bytes:
+                self._close_segment()
+
+    def rotate(self):
+        """Closes the current segment, if anything was written to it, so it can be replayed"""
+
+        with self._lock:
+            if self._file is not None and self._file_pid == os.getpid() and self._file.tell() > 0:
+                self._close_segment()
+
+    def close(self):
+
+        with self._lock:
+            if self._file is not None and self._file_pid == os.getpid():
+                self._close_segment()
+
+    def _open_segment(self):
+
+        self._file_pid = os.getpid()
+        file_name = f"{self.prefix}-{self._file_pid}-{time.time_ns()}{SEGMENT_SUFFIX}.open"
+        self._file = open(os.path.join(self.directory, file_name), 'ab', buffering=1024 * 1024)
+
+    def _close_segment(self):
+
+        self._file.close()
+        # the `.open` suffix is dropped once the segment is complete
+        os.rename(self._file.name, self._file.name[:-len('.open')])
+        self._file = None
+
+    def segments(self):
+        """Closed segments, oldest first"""
+
+        pattern = os.path.join(self.directory, f"{self.prefix}-*{SEGMENT_SUFFIX}")
+        return sorted(glob.glob(pattern), key=lambda path: int(path.rsplit('-', 1)[1][:-len(SEGMENT_SUFFIX)]))
+
+    def claim(self, segment):
+        """Renames a segment for this process to replay, returns the claimed path or None"""
+
+        claimed = f"{segment}{CLAIMED_SUFFIX}-{os.getpid()}"
+        try:
+            os.rename(segment, claimed)
+        except FileNotFoundError:
+            # claimed by another process
+            return None
+
+        return claimed
+
+    def release(self, claimed):
+        """Gives a claimed segment back, e.g. when the replay failed"""
+
+        os.rename(claimed, claimed.rsplit(CLAIMED_SUFFIX, 1)[0])
+
+    def recover(self):
+        """Releases segments claimed by, and completes segments left open by, processes that died"""
+
+        for path in glob.glob(os.path.join(self.directory, f"{self.prefix}-*")):
+            if path.endswith('.open'):
+                pid = int(os.path.basename(path)[len(self.prefix) + 1:].split('-', 1)[0])
+                if not pid_alive(pid):
+                    os.rename(path, path[:-len('.open')])
+            elif CLAIMED_SUFFIX in path:
+                pid = int(path.rsplit('-', 1)[1])
+                if not pid_alive(pid):
+                    self.release(path)
+
+    def read(self, path):
+
+        with open(path, 'rb') as segment_file:
+            return [decode_record(line) for line in segment_file if line.strip()]
+
+    def size(self):
+        """Bytes waiting in the spool"""
+
+        return sum(os.path.getsize(path) for path in glob.glob(os.path.join(self.directory, f"{self.prefix}-*")))
+
+
+def pid_alive(pid):
+
+    if pid == os.getpid():
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
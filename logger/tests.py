@@ -1,3 +1,365 @@
-from django.test import TestCase
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest import TestCase
 
-# Create your tests here.
+import mongomock
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from pymongo.errors import ServerSelectionTimeoutError
+from rest_framework.test import APITestCase
+
+from db_clients import mongodb
+from db_clients.mongodb import MONGO_URL, MongoConnection, get_mongo_client, set_mongo_client
+from users.models import User
+from .models import LOGS_INDEXES, MONGO_LOGS_COLLECTION, MongoLogsClient
+from .logging_middleware import AuditLoggingHandler
+
+
+class FailingCollection():
+
+    def __init__(self):
+        self.calls = 0
+
+    def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        raise ServerSelectionTimeoutError('mongo is down')
+
+
+class RecordingCollection():
+
+    def __init__(self):
+        self.batches = []
+
+    def insert_many(self, documents, ordered=True):
+        self.batches.append(list(documents))
+
+
+class SpooledHandler(AuditLoggingHandler):
+
+    collection = None
+
+
+def make_record(message):
+    return logging.LogRecord('audit', logging.INFO, __file__, 1, message, None, None)
+
+
+class MongoClientRegistryTests(TestCase):
+
+    def setUp(self):
+
+        self._clients = dict(mongodb._clients)
+        mongodb._clients.clear()
+
+    def tearDown(self):
+
+        mongodb._clients.clear()
+        mongodb._clients.update(self._clients)
+        mongodb._clients_pid = os.getpid()
+
+    def test_shared_client(self):
+
+        client = get_mongo_client('mongodb://registry-test')
+
+        self.assertIs(get_mongo_client('mongodb://registry-test'), client)
+        self.assertIsNot(get_mongo_client('mongodb://other-registry-test'), client)
+        self.assertIs(MongoConnection('mongolog').db.client, get_mongo_client())
+
+    def test_forked_child_gets_new_client(self):
+
+        client = get_mongo_client('mongodb://registry-test')
+        # as seen from a forked child
+        mongodb._clients_pid = -1
+
+        self.assertIsNot(get_mongo_client('mongodb://registry-test'), client)
+
+
+class AsynchronousHandlerTests(TestCase):
+
+    def make_handler(self, **kwargs):
+
+        handler = SpooledHandler('mongolog', asynchronous=True, **kwargs)
+        handler.collection = RecordingCollection()
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_batches(self):
+
+        handler = self.make_handler(batch_size=3, flush_interval=0.05)
+        for i in range(7):
+            handler.emit(make_record(f'record {i}'))
+        handler.flush()
+
+        batches = handler.collection.batches
+        self.assertTrue(all(len(batch) <= 3 for batch in batches))
+        self.assertEqual([record['message'] for batch in batches for record in batch],
+                         [f'record {i}' for i in range(7)])
+
+    def test_close_ships_queued_records(self):
+
+        handler = self.make_handler(batch_size=100, flush_interval=0.2)
+        for i in range(3):
+            handler.emit(make_record(f'record {i}'))
+        handler.close()
+
+        self.assertEqual(sum(len(batch) for batch in handler.collection.batches), 3)
+
+    def test_drop_oldest(self):
+
+        handler = self.make_handler(max_queue_size=2, overflow_policy=SpooledHandler.OVERFLOW_DROP_OLDEST)
+        # a stopped worker lets the queue fill up
+        handler._stop_event.set()
+        handler._worker.join()
+
+        for i in range(5):
+            handler.emit(make_record(f'record {i}'))
+
+        self.assertEqual(handler.dropped_records, 3)
+        self.assertEqual([handler._queue.get_nowait()['message'] for _ in range(2)], ['record 3', 'record 4'])
+
+    def test_invalid_overflow_policy(self):
+
+        with self.assertRaises(ValueError):
+            SpooledHandler('mongolog', overflow_policy='ignore')
+        with self.assertRaises(ValueError):
+            SpooledHandler('mongolog', overflow_policy=SpooledHandler.OVERFLOW_SPILL)
+
+
+class DiskSpoolTests(TestCase):
+
+    def setUp(self):
+
+        self.spool_dir = tempfile.mkdtemp()
+        self.handler = SpooledHandler(
+            'mongolog', spool_dir=self.spool_dir, failure_threshold=2, reset_timeout=3600, replay_interval=3600)
+        self.handler.collection = FailingCollection()
+
+    def tearDown(self):
+
+        self.handler.close()
+        shutil.rmtree(self.spool_dir)
+
+    def emit(self, message):
+
+        self.handler.emit(make_record(message))
+
+    def test_spool_and_replay(self):
+
+        with self.assertLogs('django', 'ERROR') as logs:
+            for i in range(5):
+                self.emit(f'record {i}')
+
+        # the circuit opened after two failures, the other records skipped Mongo
+        self.assertEqual(self.handler.collection.calls, 2)
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(self.handler.dropped_records, 0)
+
+        # nothing is replayed while the circuit is open
+        self.assertEqual(self.handler.replay_spool(), 0)
+
+        self.handler.circuit_breaker.reset_timeout = 0
+        with self.assertLogs('django', 'ERROR'):
+            self.assertEqual(self.handler.replay_spool(), 0)
+
+        collection = mongomock.MongoClient().db.logs
+        self.handler.collection = collection
+        self.handler.circuit_breaker.reset_timeout = 0
+
+        self.assertEqual(self.handler.replay_spool(), 5)
+        self.assertEqual(self.handler.spool.segments(), [])
+        self.assertFalse(self.handler.circuit_breaker.is_open)
+
+        logs = list(collection.find().sort('ts', 1))
+        self.assertEqual([log['message'] for log in logs], [f'record {i}' for i in range(5)])
+        self.assertEqual(logs[0]['ts'].__class__.__name__, 'datetime')
+
+    def test_replay_is_idempotent(self):
+
+        self.emit('record')
+
+        collection = mongomock.MongoClient().db.logs
+        self.handler.collection = collection
+        self.handler.spool.rotate()
+        segment = self.handler.spool.segments()[0]
+        collection.insert_many(self.handler.spool.read(segment))
+
+        # a replay interrupted after the insert is retried without duplicating records
+        self.assertEqual(self.handler.replay_spool(), 1)
+        self.assertEqual(collection.count_documents({}), 1)
+
+    def test_spool_failure(self):
+
+        def append(database_records):
+            raise OSError('disk full')
+
+        self.handler.spool.append = append
+        with self.assertLogs('django', 'ERROR') as logs:
+            self.emit('record')
+
+        self.assertEqual(self.handler.dropped_records, 1)
+        self.assertIn('disk full', logs.output[-1])
+
+    def test_segment_rotation(self):
+
+        self.handler.spool.segment_max_bytes = 1
+        self.handler.circuit_breaker.record_failure()
+        self.handler.circuit_breaker.record_failure()
+
+        for i in range(3):
+            self.emit(f'record {i}')
+
+        self.assertEqual(len(self.handler.spool.segments()), 3)
+
+
+class MetricsViewTests(SimpleTestCase):
+
+    def test_internal_client(self):
+
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'api_requests_total', response.content)
+
+    @override_settings(METRICS={'ALLOWED_NETWORKS': ['10.0.0.0/8']})
+    def test_external_client(self):
+
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.1.2.3').status_code, 200)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='203.0.113.7').status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code, 403)
+
+
+class MongoLogsClientTests(TestCase):
+
+    def setUp(self):
+
+        self.connection = MongoConnection('logs_test')
+        self._client = mongodb._clients.get(MONGO_URL)
+        set_mongo_client(mongomock.MongoClient())
+
+        start = datetime(2021, 1, 1)
+        self.logs = [
+            {'type': log_type, 'level': 'INFO', 'module': 'views', 'message': f'{log_type} {i}',
+             'ts': start + timedelta(minutes=i)}
+            for i in range(5) for log_type in ('access', 'audit')
+        ]
+        self.connection.get_collection(MONGO_LOGS_COLLECTION).insert_many([dict(log) for log in self.logs])
+        self.logs_client = MongoLogsClient(self.connection)
+
+    def tearDown(self):
+
+        if self._client is not None:
+            set_mongo_client(self._client)
+        else:
+            mongodb._clients.pop(MONGO_URL, None)
+
+    def test_pages(self):
+
+        messages, cursor = [], None
+        while True:
+            logs, cursor = self.logs_client.get_logs_page(limit=3, log_type='access', cursor=cursor)
+            self.assertLessEqual(len(logs), 3)
+            messages += [log['message'] for log in logs]
+            if cursor is None:
+                break
+
+        self.assertEqual(messages, [f'access {i}' for i in reversed(range(5))])
+
+    def test_filters(self):
+
+        logs, _ = self.logs_client.get_logs_page(
+            start_date=datetime(2021, 1, 1, 0, 1), end_date=datetime(2021, 1, 1, 0, 2), level='info')
+        self.assertEqual(len(logs), 4)
+
+        logs, _ = self.logs_client.get_logs_page(module='models')
+        self.assertEqual(logs, [])
+
+        with self.assertRaises(ValueError):
+            self.logs_client.get_logs_page(log_type='unknown')
+        with self.assertRaises(ValueError):
+            self.logs_client.get_logs_page(cursor='not a cursor')
+
+    def test_iter_logs(self):
+
+        self.assertEqual(len(list(self.logs_client.iter_logs(log_type='audit'))), 5)
+
+    def test_ensure_schema(self):
+
+        conn = self.connection.get_collection(MONGO_LOGS_COLLECTION)
+        log_id = conn.insert_one({'type': 'audit', 'message': 'written before ts'}).inserted_id
+
+        actions = self.logs_client.ensure_schema(backfill=True)
+        self.assertIn('backfilled ts on 1 logs', actions)
+        self.assertEqual(conn.find_one({'_id': log_id})['ts'], log_id.generation_time.replace(tzinfo=None))
+        self.assertTrue(set(LOGS_INDEXES) <= set(conn.index_information()))
+
+        # a second run has nothing left to do
+        self.assertEqual(self.logs_client.ensure_schema(backfill=True), ['backfilled ts on 0 logs'])
+
+
+class GetAllLogsTests(APITestCase):
+
+    def setUp(self):
+
+        self._client = mongodb._clients.get(MONGO_URL)
+        set_mongo_client(mongomock.MongoClient())
+        MongoConnection().get_collection(MONGO_LOGS_COLLECTION).insert_many([
+            {'type': 'access', 'level': 'INFO', 'module': 'views', 'message': f'log {i}',
+             'ts': datetime(2021, 1, 1) + timedelta(minutes=i)}
+            for i in range(3)
+        ])
+
+    def tearDown(self):
+
+        if self._client is not None:
+            set_mongo_client(self._client)
+        else:
+            mongodb._clients.pop(MONGO_URL, None)
+
+    def test_super_admin_only(self):
+
+        self.client.force_authenticate(User.objects.create_user('logs_user'))
+        self.assertEqual(self.client.get(reverse('get_all_logs')).status_code, 403)
+
+    def test_page_and_stream(self):
+
+        self.client.force_authenticate(User.objects.create_user('logs_super_admin', role=User.SUPER_ADMIN))
+
+        response = self.client.get(reverse('get_all_logs'), {'limit': 2})
+        self.assertEqual([log['message'] for log in response.data['results']], ['log 2', 'log 1'])
+
+        response = self.client.get(reverse('get_all_logs'), {'limit': 2, 'cursor': response.data['next_cursor']})
+        self.assertEqual([log['message'] for log in response.data['results']], ['log 0'])
+        self.assertIsNone(response.data['next_cursor'])
+
+        response = self.client.get(reverse('get_all_logs'), {'stream': 'true'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['message'] for line in lines], ['log 2', 'log 1', 'log 0'])
+
+        self.assertEqual(self.client.get(reverse('get_all_logs'), {'type': 'unknown'}).status_code, 400)
+
+    def test_legacy_list(self):
+
+        self.client.force_authenticate(User.objects.create_user('logs_super_admin', role=User.SUPER_ADMIN))
+
+        response = self.client.get(reverse('get_all_logs'), {'type': 'access'})
+        self.assertEqual([log['message'] for log in response.data], ['log 2', 'log 1', 'log 0'])
+
+    def test_logs_without_ts(self):
+
+        MongoConnection().get_collection(MONGO_LOGS_COLLECTION).insert_many([
+            {'type': 'access', 'level': 'INFO', 'module': 'views', 'message': f'old log {i}'} for i in range(3)
+        ])
+        self.client.force_authenticate(User.objects.create_user('logs_super_admin', role=User.SUPER_ADMIN))
+
+        messages, params = [], {'limit': 2}
+        while True:
+            response = self.client.get(reverse('get_all_logs'), params)
+            messages += [log['message'] for log in response.data['results']]
+            if response.data['next_cursor'] is None:
+                break
+            params['cursor'] = response.data['next_cursor']
+
+        self.assertEqual(messages, ['log 2', 'log 1', 'log 0', 'old log 2', 'old log 1', 'old log 0'])
@@ -1,6 +1,7 @@
 from django.urls import path, include
-from .views import GetAllLogs
+from .views import GetAllLogs, async_get_all_logs
 
 urlpatterns = [
     path('', GetAllLogs.as_view(), name='get_all_logs'),
+    path('async', async_get_all_logs, name='async_get_all_logs'),
 ]
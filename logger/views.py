@@ -1,25 +1,98 @@
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
+from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
+from oslash_project.async_api import async_api_view, json_response
 from users.permissions import IsSuperAdminUser
-from .models import MongoLogsClient
+from .models import MongoLogsClient, DEFAULT_LOGS_PAGE_SIZE, MAX_LOGS_PAGE_SIZE
 
 
 class GetAllLogs(APIView):
-    """Returns all logs
+    """Returns logs, newest first
+
+    Paginated as `{"results", "next_cursor"}` when `cursor` or `limit` is given, a plain
+    list of every matching log otherwise. `stream=true` returns every matching log as NDJSON.
     """
 
     permission_classes = (IsSuperAdminUser,)
 
+    class InputSerializer(serializers.Serializer):
+
+        type = serializers.CharField(required=False)
+        module = serializers.CharField(required=False)
+        level = serializers.CharField(required=False)
+        start_date = serializers.DateTimeField(required=False)
+        end_date = serializers.DateTimeField(required=False)
+        cursor = serializers.CharField(required=False)
+        limit = serializers.IntegerField(required=False, min_value=1, max_value=MAX_LOGS_PAGE_SIZE)
+        stream = serializers.BooleanField(required=False, default=False)
+
     def get(self, request, *args, **kwargs):
 
-        log_type = request.GET.get('type', None)
+        serializer = self.InputSerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+
+        filters = dict(serializer.validated_data)
+        filters['log_type'] = filters.pop('type', None)
+        paginate = 'cursor' in filters or 'limit' in filters
+        limit = filters.pop('limit', DEFAULT_LOGS_PAGE_SIZE)
+        stream = filters.pop('stream')
+
         try:
-            logs = MongoLogsClient().get_logs(log_type)
-        except:
-            raise ValidationError("Invalid log type")
+            if stream or not paginate:
+                filters.pop('cursor', None)
+                logs = MongoLogsClient().iter_logs(**filters)
+            else:
+                logs, next_cursor = MongoLogsClient().get_logs_page(limit=limit, **filters)
+        except ValueError as e:
+            raise ValidationError(str(e))
+
+        if stream:
+            lines = (json.dumps(log, cls=DjangoJSONEncoder) + '\n' for log in logs)
+            return StreamingHttpResponse(lines, content_type='application/x-ndjson', status=200)
+
+        if not paginate:
+            return Response(list(logs), status=200)
+
+        response = {
+            'results': logs,
+            'next_cursor': next_cursor
+        }
+        return Response(response, status=200)
+
+
+class AsyncGetAllLogsInputSerializer(GetAllLogs.InputSerializer):
+
+    # Django 3.1 iterates streaming responses on the event loop, stream from `GetAllLogs`
+    stream = None
+
+
+@async_api_view(['GET'], permission_classes=(IsSuperAdminUser,))
+async def async_get_all_logs(request):
+    """`GetAllLogs` pages for ASGI deployments, the Mongo query waits on the Mongo executor
+    instead of a request thread
+    """
+
+    serializer = AsyncGetAllLogsInputSerializer(data=request.GET)
+    serializer.is_valid(raise_exception=True)
+
+    filters = dict(serializer.validated_data)
+    filters['log_type'] = filters.pop('type', None)
+    limit = filters.pop('limit', DEFAULT_LOGS_PAGE_SIZE)
+
+    try:
+        logs, next_cursor = await MongoLogsClient().aget_logs_page(limit=limit, **filters)
+    except ValueError as e:
+        raise ValidationError(str(e))
 
-        return Response(logs, status=200)
+    response = {
+        'results': logs,
+        'next_cursor': next_cursor
+    }
+    return json_response(response, status=200)
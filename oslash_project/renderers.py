@@ -0,0 +1,36 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class FastJSONRenderer(JSONRenderer):
+    """`JSONRenderer` encoding with orjson
+
+    Produces the same compact, UTF-8 output, UTC datetimes end with `Z` as with DRF's
+    encoder. Types orjson does not know (lazy translations, Decimal, ...) go through
+    DRF's encoder, data orjson can not encode at all (non-string dict keys, e.g. the
+    item indexes of `ListField` errors) and indented output through `JSONRenderer`.
+    """
+
+    _fallback_encoder = JSONEncoder()
+
+    OPTIONS = orjson.OPT_UTC_Z
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._fallback_encoder.default, option=self.OPTIONS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # escaped by `JSONRenderer` too, so the output is a strict javascript subset
+        if b'\xe2\x80' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+        return ret
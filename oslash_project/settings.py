@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.1/ref/settings/
 """
 
+import os
 import sys
 from pathlib import Path
 import datetime
@@ -41,9 +42,11 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'users',
     'tweets',
+    'logger',
 ]
 
 MIDDLEWARE = [
+    'logger.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'logger.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'oslash_project.urls'
@@ -79,15 +83,61 @@ WSGI_APPLICATION = 'oslash_project.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'db_clients.postgresql',
         'NAME': 'oslash',
         'USER': 'postgres',
         'PASSWORD': 'postgres',
         'HOST': 'localhost',
         'PORT': '5432',
+        # connections go back to `POOL` at the end of each request and are reused by the next one,
+        # set a `CONN_MAX_AGE` instead to keep one persistent connection per thread
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 0)),
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'MAX_LIFETIME': 1800,
+            'IDLE_TIMEOUT': 300,
+            'HEALTH_CHECKS': True,
+        },
     }
 }
 
+# Read replicas, e.g. DB_REPLICA_HOSTS=replica-1:5432,replica-2:5432, see `db_clients.replicas`
+for replica_index, replica_host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    host, _, port = replica_host.partition(':')
+    DATABASES[f'replica_{replica_index}'] = dict(
+        DATABASES['default'], HOST=host, PORT=port or '5432', TEST={'MIRROR': 'default'})
+
+DATABASE_ROUTERS = ['db_clients.replicas.ReplicaRouter']
+
+# Reads of the read-only tweet views and insights go to a replica lagging less than
+# `MAX_LAG_SECONDS`, except for a user's reads `STICKY_SECONDS` after their own writes,
+# tracked in the `CACHE_ALIAS` cache, which has to be shared by every worker (see `CACHES`)
+REPLICA_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias.startswith('replica_')],
+    'MAX_LAG_SECONDS': 5,
+    'HEALTH_CHECK_INTERVAL': 10,
+    'STICKY_SECONDS': 5,
+    'CACHE_ALIAS': 'default',
+}
+
+# The tweet table is range partitioned on `created_date`, every `INTERVAL_MONTHS` months,
+# `manage_tweet_partitions` keeps `PREMAKE` months of partitions ready ahead of time
+TWEET_PARTITIONING = {
+    'INTERVAL_MONTHS': 1,
+    'PREMAKE': 3,
+}
+
+# `archive_inactive_tweets` moves tweets inactive for `RETENTION_DAYS` to `ArchivedTweet`,
+# `BATCH_SIZE` rows per transaction with `BATCH_PAUSE` seconds between batches
+TWEET_ARCHIVAL = {
+    'RETENTION_DAYS': 30,
+    'BATCH_SIZE': 1000,
+    'BATCH_PAUSE': 0.5,
+    'MAX_BATCHES': None,
+}
+
+# Mongo log handlers: records Mongo can not take are kept in `spool_dir` and replayed
+# once it is back, a circuit breaker skips Mongo while it is down
 LOGGING = {
     'version': 1,
     'handlers': {
@@ -95,16 +145,34 @@ LOGGING = {
             'class': 'logger.logging_middleware.AuditLoggingHandler',
             'database': 'mongolog',
             'collection': 'logs',
+            'asynchronous': True,
+            'batch_size': 100,
+            'flush_interval': 1.0,
+            'max_queue_size': 10000,
+            'overflow_policy': 'block',
+            'spool_dir': str(BASE_DIR / 'log_spool'),
         },
         'access_log': {
             'class': 'logger.logging_middleware.AccessLoggingHandler',
             'database': 'mongolog',
             'collection': 'logs',
+            'asynchronous': True,
+            'batch_size': 100,
+            'flush_interval': 1.0,
+            'max_queue_size': 10000,
+            'overflow_policy': 'block',
+            'spool_dir': str(BASE_DIR / 'log_spool'),
         },
         'action_log': {
             'class': 'logger.logging_middleware.ActionLoggingHandler',
             'database': 'mongolog',
             'collection': 'logs',
+            'asynchronous': True,
+            'batch_size': 100,
+            'flush_interval': 1.0,
+            'max_queue_size': 10000,
+            'overflow_policy': 'block',
+            'spool_dir': str(BASE_DIR / 'log_spool'),
         },
         'console': {
             'level': 'INFO',
@@ -140,6 +208,58 @@ LOGGING = {
     },
 }
 
+# Per-request phase timings (`Server-Timing` header), a `SAMPLE_RATE` fraction of
+# requests is also cProfiled into `DUMP_DIR`, see `manage.py profile_report`
+PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.01,
+    'DUMP_DIR': str(BASE_DIR / 'profiles'),
+}
+
+# `/metrics` only answers clients in `ALLOWED_NETWORKS`, e.g. the Prometheus scraper on the
+# private network. The reverse proxy must not forward `/metrics`, otherwise every request
+# would come from the proxy's own address.
+METRICS = {
+    'ALLOWED_NETWORKS': ['127.0.0.0/8', '::1/128', '10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16'],
+}
+
+# Serialize tweet lists from `values_list` rows instead of model instances + `TweetSerializer`
+FAST_TWEET_SERIALIZATION = True
+
+# Shared by every worker for the tweet cache, replica stickiness and JWT revocation state,
+# e.g. CACHE_LOCATION=cache-1:11211,cache-2:11211. Without it each process gets its own
+# local-memory cache, which only fits a single process such as a development server.
+if os.getenv('CACHE_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': os.getenv('CACHE_LOCATION').split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Read-through cache for single tweet reads, `BACKEND` is 'django' (the `ALIAS` cache),
+# 'lru' (per process, entries are only invalidated in the writing process and live
+# `TIMEOUT` seconds elsewhere) or None
+TWEET_CACHE = {
+    'BACKEND': 'django',
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'INVALIDATION_GRACE': 10,
+}
+
+# Retention of the Mongo logs collection, applied by `manage.py ensure_log_indexes`
+# either `ttl_days` (TTL index on `ts`) or `capped_size_bytes` (capped collection)
+MONGO_LOGS_RETENTION = {
+    'ttl_days': 90,
+    'capped_size_bytes': None,
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -161,10 +281,10 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'oslash_project.renderers.FastJSONRenderer',
     ]
 }
 
@@ -172,6 +292,15 @@ SIMPLE_JWT = {
     # how long the original token is valid for
     'ACCESS_TOKEN_LIFETIME': datetime.timedelta(days=5),
     # Only for the team to test it!
+    # built from the token claims by `StatelessJWTAuthentication`, no `User` row fetch
+    'TOKEN_USER_CLASS': 'users.models.RoleTokenUser',
+}
+
+# How long the revocation state of a user is cached, i.e. how long a revoked token
+# may still be accepted by workers other than the one that revoked it
+JWT_REVOCATION_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 30,
 }
 
 AUTH_USER_MODEL = 'users.User'
@@ -15,10 +15,12 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import include, path
+from logger.metrics import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls')),
     path('', include('tweets.urls')),
-    path('logs/', include('logger.urls'))
+    path('logs/', include('logger.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
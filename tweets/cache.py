@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from logger.metrics import TWEET_CACHE_LOOKUPS, get_registry
+
+
+class LocalMemoryLRUBackend():
+    """Per-process LRU cache, entries expire `timeout` seconds after being set
+
+    Invalidations are only seen by the process that made them, other workers keep
+    serving their copy until it expires. Use the Django cache backend with a shared
+    cache when running several workers.
+    """
+
+    def __init__(self, max_entries=10000, timeout=60, **kwargs):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key):
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, timeout=None):
+
+        with self._lock:
+            self._set(key, value, timeout)
+
+    def _set(self, key, value, timeout):
+
+        timeout = self.timeout if timeout is None else timeout
+        self._entries[key] = (time.monotonic() + timeout, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def add(self, key, value):
+        """Sets `key` unless it holds an unexpired value, returns whether it was set"""
+
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+            self._set(key, value, None)
+            return True
+
+    def delete(self, key):
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoCacheBackend():
+    """Cache backed by one of the `settings.CACHES` aliases, shared between workers when
+    the alias is a shared cache such as memcached
+    """
+
+    def __init__(self, alias='default', timeout=300, **kwargs):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.cache.set(key, value, self.timeout if timeout is None else timeout)
+
+    def add(self, key, value):
+        return self.cache.add(key, value, self.timeout)
+
+    def delete(self, key):
+        self.cache.delete(key)
+
+
+class TweetCache():
+    """Read-through cache of single tweets, keyed by tweet id and owner
+
+    Configured with `settings.TWEET_CACHE`, caching is disabled when no backend is set.
+
+    An invalidation leaves an `INVALIDATED` marker for `INVALIDATION_GRACE` seconds and
+    reads only fill empty keys, so a read that fetched the row before a write can not
+    cache it after the write's invalidation.
+    """
+
+    INVALIDATED = 'invalidated'
+
+    BACKENDS = {
+        'lru': LocalMemoryLRUBackend,
+        'django': DjangoCacheBackend,
+    }
+
+    def __init__(self):
+        self._backend = None
+        self.invalidation_grace = 10
+        self._configured = False
+
+    @property
+    def backend(self):
+
+        if not self._configured:
+            config = dict(getattr(settings, 'TWEET_CACHE', {}))
+            backend_name = config.pop('BACKEND', None)
+            self.invalidation_grace = config.pop('INVALIDATION_GRACE', 10)
+            if backend_name is not None:
+                self._backend = self.BACKENDS[backend_name](**{key.lower(): value for key, value in config.items()})
+            self._configured = True
+
+        return self._backend
+
+    @staticmethod
+    def make_key(user_id, tweet_id):
+        return f"tweet:{user_id}:{tweet_id}"
+
+    def get(self, user_id, tweet_id):
+        """Returns the cached `Tweet` or None, counting hits and misses in `TWEET_CACHE_LOOKUPS`"""
+
+        if self.backend is None:
+            return None
+
+        tweet = self.backend.get(self.make_key(user_id, tweet_id))
+        if tweet == self.INVALIDATED:
+            tweet = None
+
+        TWEET_CACHE_LOOKUPS.labels('miss' if tweet is None else 'hit').inc()
+
+        return tweet
+
+    def set(self, tweet):
+        """Caches a tweet, unless it was invalidated within `INVALIDATION_GRACE` seconds
+
+        Tweets read from a replica are not cached, a lagging replica may return a row
+        older than the write the invalidation was for.
+        """
+
+        if self.backend is not None and tweet._state.db == DEFAULT_DB_ALIAS:
+            self.backend.add(self.make_key(tweet.user_id, tweet.id), tweet)
+
+    def invalidate(self, user_id, tweet_id):
+
+        if self.backend is not None:
+            self.backend.set(self.make_key(user_id, tweet_id), self.INVALIDATED, self.invalidation_grace)
+
+    def reset(self):
+        """Drops the LRU entries, the backend is re-read from settings on next use"""
+
+        self._backend = None
+        self._configured = False
+
+    def stats(self):
+        """Hit / miss counts of every worker, from the metrics registry"""
+
+        registry = get_registry()
+        hits, misses = (
+            registry.get_sample_value('tweet_cache_lookups_total', {'result': result}) or 0
+            for result in ('hit', 'miss'))
+
+        lookups = hits + misses
+        return {
+            'backend': type(self.backend).__name__ if self.backend is not None else None,
+            'hits': int(hits),
+            'misses': int(misses),
+            'hit_ratio': hits / lookups if lookups else None,
+        }
+
+
+tweet_cache = TweetCache()
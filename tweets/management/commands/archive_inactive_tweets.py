@@ -0,0 +1,67 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from tweets.models import Tweet
+
+
+def get_archival_settings():
+
+    return dict({
+        'RETENTION_DAYS': 30,
+        'BATCH_SIZE': 1000,
+        'BATCH_PAUSE': 0.5,
+        'MAX_BATCHES': None,
+    }, **getattr(settings, 'TWEET_ARCHIVAL', {}))
+
+
+class Command(BaseCommand):
+    """Moves tweets inactive for longer than the retention window to the `ArchivedTweet` table
+
+    Meant to run on a schedule, e.g. nightly from cron. Every batch is its own short
+    transaction followed by a pause, so the job never holds many row locks nor floods
+    replication. With `--vacuum` the tweet table is vacuumed afterwards, so the space of
+    the archived rows is reused by live tweets instead of growing the table.
+    """
+
+    help = 'Archives inactive tweets older than the retention window in bounded, throttled batches'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--retention-days', type=int)
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--batch-pause', type=float, help='Seconds to sleep between batches')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches, e.g. to fit a window')
+        parser.add_argument('--vacuum', action='store_true', help='VACUUM ANALYZE the tweet table afterwards')
+
+    def handle(self, *args, **options):
+
+        if connection.vendor != 'postgresql':
+            raise CommandError('Tweet archival needs PostgreSQL')
+
+        archival_settings = get_archival_settings()
+        for name in ('retention_days', 'batch_size', 'batch_pause', 'max_batches'):
+            if options[name] is None:
+                options[name] = archival_settings[name.upper()]
+
+        inactive_before = timezone.now() - timedelta(days=options['retention_days'])
+
+        total = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            archived = Tweet.archive_inactive(inactive_before, options['batch_size'])
+            total += archived
+            batches += 1
+
+            if archived < options['batch_size']:
+                break
+            time.sleep(options['batch_pause'])
+
+        self.stdout.write(f"Archived {total} tweets in {batches} batches")
+
+        if options['vacuum']:
+            with connection.cursor() as cursor:
+                cursor.execute(f"VACUUM ANALYZE {Tweet._meta.db_table}")
@@ -0,0 +1,78 @@
+import json
+import statistics
+import time
+
+from django.db import connections
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+from django.core.management.base import BaseCommand
+
+from db_clients.postgresql.base import DatabaseWrapper as PooledDatabaseWrapper
+from .benchmark_endpoints import percentile
+
+MODES = ('direct', 'pooled', 'persistent')
+
+
+class Command(BaseCommand):
+    """Measures what connection setup costs each request, with and without the pool
+
+    Every iteration is one simulated request: a single-row query, like `Tweet.get_tweet`,
+    then the end of request close.
+
+    - `direct`: the stock backend with `CONN_MAX_AGE = 0`, a new connection per request
+    - `pooled`: `db_clients.postgresql`, the connection goes back to the pool
+    - `persistent`: the stock backend with `CONN_MAX_AGE > 0`, never closed
+    """
+
+    help = 'Reports per-request latency of direct, pooled and persistent Postgres connections as JSON'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--iterations', type=int, default=500)
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+
+        settings_dict = dict(connections[options['database']].settings_dict)
+        pool_settings = settings_dict.pop('POOL', None) or {}
+
+        wrappers = {
+            'direct': PostgresDatabaseWrapper(dict(settings_dict, CONN_MAX_AGE=0), 'benchmark_direct'),
+            'pooled': PooledDatabaseWrapper(
+                dict(settings_dict, CONN_MAX_AGE=0, POOL=pool_settings), 'benchmark_pooled'),
+            'persistent': PostgresDatabaseWrapper(dict(settings_dict, CONN_MAX_AGE=None), 'benchmark_persistent'),
+        }
+
+        report = {}
+        for mode in MODES:
+            latencies = self.run(wrappers[mode], close=mode != 'persistent', iterations=options['iterations'])
+            report[mode] = {
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p95_ms': round(percentile(latencies, 95), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+                'mean_ms': round(statistics.mean(latencies), 3),
+            }
+            wrappers[mode].close()
+
+        report['saved_per_request_ms'] = round(report['direct']['mean_ms'] - report['pooled']['mean_ms'], 3)
+
+        report = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(report)
+        else:
+            self.stdout.write(report)
+
+    def run(self, wrapper, close, iterations):
+
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            if close:
+                wrapper.close()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        return latencies
@@ -0,0 +1,283 @@
+import json
+import logging
+import statistics
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from db_clients.mongodb import set_mongo_client
+from tweets.cache import tweet_cache
+from tweets.models import Tweet, TweetModRequest
+from users.models import User
+from users.tokens import RoleRefreshToken
+
+MONGO_OPERATIONS = ('insert_one', 'insert_many', 'find', 'find_one', 'update_many', 'count_documents', 'aggregate')
+
+DATE_FORMAT = '%Y-%m-%dT%H:%M'
+
+
+class Endpoint():
+    """A benchmarked route
+
+    :param url_name: URL name, as in the app `urls.py`
+    :param role: name of the seeded user that calls the route, None for anonymous
+    :param args: callable `(context, iteration)` returning the URL arguments
+    :param data: callable `(context, iteration)` returning the request payload
+    """
+
+    def __init__(self, url_name, method, role='user', args=None, data=None):
+        self.url_name = url_name
+        self.method = method
+        self.role = role
+        self.args = args or (lambda context, i: [])
+        self.data = data or (lambda context, i: None)
+
+
+def insights_dates(context, i):
+
+    end_date = timezone.now() + timedelta(minutes=1)
+    return {
+        'start_date': (end_date - timedelta(days=30)).strftime(DATE_FORMAT),
+        'end_date': end_date.strftime(DATE_FORMAT),
+    }
+
+
+ENDPOINTS = [
+    # tweets
+    Endpoint('create_tweet', 'post', data=lambda context, i: {'data': f'benchmark tweet {i}'}),
+    Endpoint('bulk_create_tweets', 'post',
+             data=lambda context, i: {'tweets': [{'data': f'bulk tweet {i} {j}'} for j in range(50)]}),
+    Endpoint('get_all_tweets', 'get'),
+    Endpoint('get_all_tweets', 'get', data=lambda context, i: {'page_size': 50}),
+    Endpoint('get_tweet', 'get', args=lambda context, i: [context['read_tweets'][i % len(context['read_tweets'])]]),
+    Endpoint('search_tweets', 'get', data=lambda context, i: {'q': 'benchmark tweet'}),
+    Endpoint('search_tweets', 'get', role='admin', data=lambda context, i: {'q': 'bulk tweet', 'scope': 'all'}),
+    Endpoint('update_tweet', 'post', args=lambda context, i: [context['update_tweets'][i]],
+             data=lambda context, i: {'data': f'updated {i}'}),
+    Endpoint('delete_tweet', 'delete', args=lambda context, i: [context['delete_tweets'][i]]),
+    Endpoint('async_create_tweet', 'post', data=lambda context, i: {'data': f'async benchmark tweet {i}'}),
+    Endpoint('async_get_all_tweets', 'get'),
+    Endpoint('async_get_all_tweets', 'get', data=lambda context, i: {'page_size': 50}),
+    Endpoint('async_get_tweet', 'get',
+             args=lambda context, i: [context['read_tweets'][i % len(context['read_tweets'])]]),
+    Endpoint('async_update_tweet', 'post', args=lambda context, i: [context['update_tweets'][i]],
+             data=lambda context, i: {'data': f'async updated {i}'}),
+    Endpoint('async_delete_tweet', 'delete', args=lambda context, i: [context['async_delete_tweets'][i]]),
+    Endpoint('new_tweet_update_request', 'post', role='admin',
+             args=lambda context, i: [context['read_tweets'][i % len(context['read_tweets'])]],
+             data=lambda context, i: {'data': f'moderated {i}'}),
+    Endpoint('new_tweet_delete_request', 'delete', role='admin',
+             args=lambda context, i: [context['read_tweets'][i % len(context['read_tweets'])]]),
+    Endpoint('tweet_modification_action', 'post', role='super_admin',
+             args=lambda context, i: [context['single_mod_requests'][i]], data=lambda context, i: {'action': 'reject'}),
+    Endpoint('bulk_tweet_modification_action', 'post', role='super_admin',
+             data=lambda context, i: {'ids': context['bulk_mod_requests'][i], 'action': 'reject'}),
+    Endpoint('pending_tweet_modification_requests', 'get', role='super_admin',
+             data=lambda context, i: {'page_size': 50}),
+    Endpoint('claim_tweet_modification_requests', 'post', role='super_admin', data=lambda context, i: {'count': 10}),
+    Endpoint('user_freq_insights', 'post', role='super_admin',
+             args=lambda context, i: [context['users']['user'].id], data=insights_dates),
+    Endpoint('admin_user_count_insights', 'post', role='super_admin',
+             args=lambda context, i: [context['users']['admin'].id], data=insights_dates),
+    Endpoint('tweet_cache_insights', 'get', role='super_admin'),
+
+    # users
+    Endpoint('token_obtain_pair', 'post', role=None,
+             data=lambda context, i: {'username': 'bench_user', 'password': 'bench_user'}),
+    Endpoint('token_refresh', 'post', role=None, data=lambda context, i: {'refresh': context['refresh_token']}),
+    Endpoint('login', 'post', role=None, data=lambda context, i: {
+        'username': f'bench_register_{i}', 'password': 'Bench-password-1', 'first_name': 'bench',
+        'last_name': 'bench', 'email': f'bench_register_{i}@example.com'}),
+
+    # logs
+    Endpoint('get_all_logs', 'get', role='super_admin', data=lambda context, i: {'limit': 100}),
+    Endpoint('get_all_logs', 'get', role='super_admin', data=lambda context, i: {'type': 'access', 'limit': 100}),
+    Endpoint('async_get_all_logs', 'get', role='super_admin', data=lambda context, i: {'limit': 100}),
+
+    # metrics
+    Endpoint('metrics', 'get', role=None),
+]
+
+
+def percentile(values, percent):
+
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class Command(BaseCommand):
+    """Benchmarks every tweets / users / logs route through the Django test client
+
+    Runs against a throwaway test database, with Mongo replaced by mongomock, and
+    prints p50/p95/p99 latency, SQL queries and Mongo calls per endpoint as JSON.
+    """
+
+    help = 'Reports latency, SQL query and Mongo call counts for every API endpoint as JSON'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--tweets-per-user', type=int, default=1000)
+        parser.add_argument('--mod-requests', type=int, default=1000)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+
+        try:
+            import mongomock
+        except ImportError:
+            raise CommandError('mongomock is required to run the benchmark')
+
+        self.mongo_calls = 0
+        self.count_mongo_calls(mongomock.collection.Collection)
+        set_mongo_client(mongomock.MongoClient())
+
+        setup_test_environment()
+        old_database_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+        try:
+            tweet_cache.reset()
+            context = self.seed(options)
+            report = self.run(context, options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+            teardown_test_environment()
+
+        report = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(report)
+        else:
+            self.stdout.write(report)
+
+    def count_mongo_calls(self, collection_class):
+
+        def counted(method):
+            @wraps(method)
+            def wrapper(*args, **kwargs):
+                self.mongo_calls += 1
+                return method(*args, **kwargs)
+            return wrapper
+
+        for operation in MONGO_OPERATIONS:
+            setattr(collection_class, operation, counted(getattr(collection_class, operation)))
+
+    def seed(self, options):
+
+        iterations = options['iterations']
+        users = {
+            'user': User.objects.create_user('bench_user', password='bench_user'),
+            'admin': User.objects.create_user('bench_admin', password='bench_admin', role=User.ADMIN),
+            'super_admin': User.objects.create_user(
+                'bench_super_admin', password='bench_super_admin', role=User.SUPER_ADMIN),
+        }
+        other_users = [User.objects.create_user(f'bench_user_{i}') for i in range(options['users'] - 1)]
+
+        for user in [users['user']] + other_users:
+            Tweet.bulk_create_tweets(user, [f'seed tweet {i}' for i in range(options['tweets_per_user'])])
+
+        tweet_ids = list(Tweet.objects.filter(user=users['user']).values_list('id', flat=True))
+        if len(tweet_ids) < 4 * iterations:
+            raise CommandError('--tweets-per-user must be at least 4 times --iterations')
+
+        other_tweet_ids = list(Tweet.objects.exclude(user=users['user']).values_list('id', flat=True)[:1000]) \
+            or tweet_ids
+        mod_request_count = max(options['mod_requests'], iterations * 11)
+        for i in range(mod_request_count):
+            TweetModRequest.new_delete_request(users['admin'], other_tweet_ids[i % len(other_tweet_ids)])
+        mod_request_ids = list(TweetModRequest.objects.order_by('id').values_list('id', flat=True))
+
+        return {
+            'users': users,
+            'tokens': {role: str(RoleRefreshToken.for_user(user).access_token) for role, user in users.items()},
+            'refresh_token': str(RoleRefreshToken.for_user(users['user'])),
+            'read_tweets': tweet_ids[:iterations],
+            'update_tweets': tweet_ids[iterations:2 * iterations],
+            'delete_tweets': tweet_ids[2 * iterations:3 * iterations],
+            'async_delete_tweets': tweet_ids[3 * iterations:4 * iterations],
+            'single_mod_requests': mod_request_ids[:iterations],
+            'bulk_mod_requests': [
+                mod_request_ids[iterations + 10 * i:iterations + 10 * (i + 1)] for i in range(iterations)
+            ],
+        }
+
+    def run(self, context, iterations):
+
+        client = APIClient()
+        report = {}
+
+        for endpoint in ENDPOINTS:
+            if endpoint.role is None:
+                client.credentials()
+            else:
+                client.credentials(HTTP_AUTHORIZATION=f"Bearer {context['tokens'][endpoint.role]}")
+
+            latencies = []
+            query_counts = []
+            statuses = set()
+            mongo_calls_before = self.mongo_calls
+
+            for i in range(iterations):
+                url = reverse(endpoint.url_name, args=endpoint.args(context, i))
+                request = getattr(client, endpoint.method)
+                request_kwargs = {'format': 'json'} if endpoint.method != 'get' else {}
+
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = request(url, endpoint.data(context, i), **request_kwargs)
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+                query_counts.append(len(queries))
+                statuses.add(response.status_code)
+
+            # asynchronous log handlers ship in the background, count their writes with the endpoint
+            self.flush_log_handlers()
+
+            key = endpoint.url_name
+            if endpoint.data(context, 0) and endpoint.method == 'get':
+                key += '?' + '&'.join(f'{name}={value}' for name, value in endpoint.data(context, 0).items())
+
+            report[key] = {
+                'method': endpoint.method.upper(),
+                'statuses': sorted(statuses),
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p95_ms': round(percentile(latencies, 95), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+                'mean_ms': round(statistics.mean(latencies), 3),
+                'sql_queries': round(statistics.mean(query_counts), 2),
+                'mongo_calls': round((self.mongo_calls - mongo_calls_before) / iterations, 2),
+            }
+
+        missing = self.url_names() - {endpoint.url_name for endpoint in ENDPOINTS}
+        if missing:
+            self.stderr.write(f"Routes without a benchmark: {', '.join(sorted(missing))}")
+
+        return report
+
+    def flush_log_handlers(self):
+
+        for logger_name in ('audit', 'access', 'action'):
+            for handler in logging.getLogger(logger_name).handlers:
+                handler.flush()
+
+    def url_names(self, resolver=None):
+
+        url_names = set()
+        for pattern in (resolver or get_resolver()).url_patterns:
+            if isinstance(pattern, URLResolver):
+                if pattern.app_name != 'admin':
+                    url_names |= self.url_names(pattern)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                url_names.add(pattern.name)
+
+        return url_names
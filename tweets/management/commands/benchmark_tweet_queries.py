@@ -0,0 +1,107 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tweets.models import Tweet, TweetModRequest
+from users.models import User
+
+BENCHMARK_USERNAME_PREFIX = 'bench_user_'
+
+
+class Command(BaseCommand):
+    """Seeds a large Tweet table and prints the query plans of the hot queries
+    with and without the indexes declared on `Tweet` and `TweetModRequest`
+    """
+
+    help = 'Benchmarks the hot Tweet / TweetModRequest queries against a seeded table'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--skip-seed', action='store_true',
+                            help='Reuse the rows seeded by a previous run')
+
+    def handle(self, *args, **options):
+
+        if not options['skip_seed']:
+            self.seed(options['rows'], options['users'], options['chunk_size'])
+
+        user = User.objects.filter(username__startswith=BENCHMARK_USERNAME_PREFIX).first()
+        admin = User.objects.filter(role=User.ADMIN).first()
+        end_date = timezone.now()
+        start_date = end_date - timedelta(days=30)
+
+        queries = {
+            'get_all_tweets': lambda: Tweet.objects.filter(user=user),
+            'get_tweet_frequency': lambda: Tweet.objects.filter(
+                user__id=user.id, created_date__range=[start_date, end_date]),
+            'get_admin_mod_requests_count': lambda: TweetModRequest.objects.filter(
+                requester__id=admin.id, created_date__range=[start_date, end_date]),
+        }
+
+        self.stdout.write('=== without indexes')
+        with transaction.atomic():
+            # DDL is transactional in Postgres, the indexes come back on rollback
+            with connection.schema_editor() as schema_editor:
+                for model in (Tweet, TweetModRequest):
+                    for index in model._meta.indexes:
+                        schema_editor.remove_index(model, index)
+
+            self.report(queries)
+            transaction.set_rollback(True)
+
+        self.stdout.write('=== with indexes')
+        self.report(queries)
+
+    def report(self, queries):
+
+        for name, build_queryset in queries.items():
+            queryset = build_queryset()
+
+            start = time.perf_counter()
+            if name == 'get_all_tweets':
+                list(queryset[:50])
+            else:
+                queryset.count()
+            elapsed = (time.perf_counter() - start) * 1000
+
+            self.stdout.write(f'--- {name} ({elapsed:.2f} ms)')
+            self.stdout.write(queryset.explain(analyze=True))
+
+    def seed(self, rows, users, chunk_size):
+
+        bench_users = [
+            User.objects.get_or_create(username=f'{BENCHMARK_USERNAME_PREFIX}{i}')[0] for i in range(users)
+        ]
+        admin = User.objects.filter(role=User.ADMIN).first()
+        now = timezone.now()
+
+        for offset in range(0, rows, chunk_size):
+            tweets = Tweet.naive_objects.bulk_create([
+                Tweet(user=random.choice(bench_users), data=f'benchmark tweet {offset + i}',
+                      active=random.random() > 0.1)
+                for i in range(min(chunk_size, rows - offset))
+            ])
+
+            # `auto_now_add` ignores explicit values, spread the history over a year afterwards
+            for tweet in tweets:
+                tweet.created_date = now - timedelta(minutes=random.randint(0, 525600))
+            Tweet.naive_objects.bulk_update(tweets, ['created_date'], batch_size=1000)
+
+            if admin is not None:
+                TweetModRequest.objects.bulk_create([
+                    TweetModRequest(requester=admin, mod_type=TweetModRequest.DELETE, tweet=tweet)
+                    for tweet in tweets[:chunk_size // 100]
+                ])
+
+            self.stdout.write(f'seeded {offset + len(tweets)}/{rows} tweets')
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE tweets_tweet')
+            cursor.execute('ANALYZE tweets_tweetmodrequest')
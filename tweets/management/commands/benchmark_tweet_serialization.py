@@ -0,0 +1,52 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from oslash_project.renderers import FastJSONRenderer
+from tweets.models import Tweet
+from tweets.serializers import TweetSerializer, serialize_tweet_rows
+
+
+class Command(BaseCommand):
+    """Compares the per-row CPU cost of rendering a tweet list through `TweetSerializer`
+    and through the `values_list` fast path, with the stock and the orjson renderer
+
+    Runs on in-memory rows, the database is not involved.
+    """
+
+    help = 'Benchmarks the per-row CPU cost of the tweet list serialization paths'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+
+        now = timezone.now()
+        rows = [(i, f'benchmark tweet number {i}', now - timedelta(seconds=i)) for i in range(options['rows'])]
+        tweets = [Tweet(id=tweet_id, data=data, created_date=created_date) for tweet_id, data, created_date in rows]
+
+        paths = {
+            'serializer + JSONRenderer': lambda: JSONRenderer().render(TweetSerializer(tweets, many=True).data),
+            'serializer + FastJSONRenderer': lambda: FastJSONRenderer().render(TweetSerializer(tweets, many=True).data),
+            'values rows + JSONRenderer': lambda: JSONRenderer().render(serialize_tweet_rows(rows)),
+            'values rows + FastJSONRenderer': lambda: FastJSONRenderer().render(serialize_tweet_rows(rows)),
+        }
+
+        outputs = {name: render() for name, render in paths.items()}
+        if len(set(outputs.values())) != 1:
+            self.stderr.write('Warning: the serialization paths do not render identical JSON')
+
+        for name, render in paths.items():
+            best = min(self.time_once(render) for _ in range(options['repeat']))
+            self.stdout.write(f'{name:<32} {best / len(rows) * 1e6:8.2f} us/row')
+
+    def time_once(self, render):
+
+        start = time.process_time()
+        render()
+        return time.process_time() - start
@@ -0,0 +1,89 @@
+import json
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from .benchmark_endpoints import percentile
+
+DEFAULT_PATHS = ('tweet/get_all', 'async/tweet/get_all', 'logs/?limit=100', 'logs/async?limit=100')
+
+
+class Command(BaseCommand):
+    """Fires concurrent GET requests at a running server and reports throughput and latency
+    at each concurrency level, to find where a deployment stops scaling
+
+    Run it against the same code served under WSGI and ASGI, e.g.
+
+        gunicorn oslash_project.wsgi -w 4
+        gunicorn oslash_project.asgi:application -w 4 -k uvicorn.workers.UvicornWorker
+
+    and compare the sync and async routes of each, `--paths` defaults to both
+    versions of the tweet list and the logs page.
+    """
+
+    help = 'Reports requests per second and latency of a running server at increasing concurrency as JSON'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/')
+        parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+        parser.add_argument('--token', help='Access token sent as a Bearer Authorization header')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 64, 128])
+        parser.add_argument('--requests', type=int, default=500, help='Requests per path and concurrency level')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+
+        headers = {'Authorization': f"Bearer {options['token']}"} if options['token'] else {}
+
+        report = {}
+        for path in options['paths']:
+            url = options['base_url'].rstrip('/') + '/' + path.lstrip('/')
+            report[path] = {
+                concurrency: self.run(url, headers, concurrency, options['requests'], options['timeout'])
+                for concurrency in options['concurrency']
+            }
+
+        report = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(report)
+        else:
+            self.stdout.write(report)
+
+    def run(self, url, headers, concurrency, request_count, timeout):
+
+        def fetch(_):
+
+            request = urllib.request.Request(url, headers=headers)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except (urllib.error.URLError, OSError):
+                status = None
+
+            return (time.perf_counter() - start) * 1000, status
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(fetch, range(request_count)))
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency for latency, _ in results]
+        return {
+            'requests_per_second': round(request_count / elapsed, 1),
+            'errors': sum(1 for _, status in results if status is None or status >= 500),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'mean_ms': round(statistics.mean(latencies), 3),
+        }
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tweets.models import TweetCountRollup, TweetModRequest
+from tweets.partitions import add_months, detach_partition, ensure_partitions, get_partitioning_settings, \
+    is_partitioned, list_partitions, partition_start
+
+
+class Command(BaseCommand):
+    """Creates the upcoming partitions of the tweet table and detaches the old ones
+
+    Meant to run daily, e.g. from cron. Detaching is opt-in: a detached partition is
+    renamed `tweets_tweet_archive_<YYYY>_<MM>` and its tweets are no longer visible to
+    the API and no longer counted by the tweet insights. The tweet list ETag changes with
+    them, its `Last-Modified` does not. Partitions holding tweets a `TweetModRequest` points
+    to are kept.
+    """
+
+    help = 'Creates future tweet partitions and detaches the ones older than --detach-after-months'
+
+    def add_arguments(self, parser):
+
+        parser.add_argument('--premake', type=int,
+                            help='Months of partitions to create ahead, defaults to TWEET_PARTITIONING["PREMAKE"]')
+        parser.add_argument('--detach-after-months', type=int,
+                            help='Detach the partitions that ended more than this many months ago')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+
+        if connection.vendor != 'postgresql':
+            raise CommandError('Tweet partitioning needs PostgreSQL')
+
+        partitioning_settings = get_partitioning_settings()
+        premake = options['premake'] if options['premake'] is not None else partitioning_settings['PREMAKE']
+        # month arithmetic from the first day of the current partition, not from today
+        current_start = partition_start(timezone.now(), partitioning_settings['INTERVAL_MONTHS'])
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                raise CommandError('The tweet table is not partitioned, run the migrations first')
+
+            until = add_months(current_start, premake)
+            if options['dry_run']:
+                partitions = list_partitions(cursor)
+                if not partitions or partitions[-1][2] <= until:
+                    self.stdout.write(f"Would create partitions up to {until:%Y-%m}")
+            else:
+                for name in ensure_partitions(cursor, until):
+                    self.stdout.write(f"Created {name}")
+
+            if options['detach_after_months'] is not None:
+                cutoff = partition_start(add_months(current_start, -options['detach_after_months']),
+                                         partitioning_settings['INTERVAL_MONTHS'])
+                for name, start, end in list_partitions(cursor):
+                    if end > cutoff:
+                        break
+
+                    if TweetModRequest.objects.filter(
+                            tweet__created_date__gte=start, tweet__created_date__lt=end).exists():
+                        self.stdout.write(f"Kept {name}, modification requests refer to its tweets")
+                        continue
+
+                    if options['dry_run']:
+                        self.stdout.write(f"Would detach {name}")
+                    else:
+                        self.stdout.write(f"Detached {name} as {detach_partition(cursor, name)}")
+                        # partitions are aligned on UTC months, so are the hour and day buckets
+                        TweetCountRollup.objects.filter(bucket__gte=start, bucket__lt=end).delete()
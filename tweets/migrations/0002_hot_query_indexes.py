@@ -0,0 +1,25 @@
+# Generated by Django 3.1.5 on 2026-10-17 14:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tweet',
+            index=models.Index(condition=models.Q(active=True), fields=['user', '-created_date', '-id'], name='tweet_active_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tweetmodrequest',
+            index=models.Index(fields=['requester', 'created_date'], name='modrequest_requester_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tweetmodrequest',
+            index=models.Index(condition=models.Q(approved__isnull=True), fields=['created_date'], name='modrequest_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 3.1.5 on 2026-10-17 14:44
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Trunc
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+
+    Tweet = apps.get_model('tweets', 'Tweet')
+    TweetModRequest = apps.get_model('tweets', 'TweetModRequest')
+    TweetCountRollup = apps.get_model('tweets', 'TweetCountRollup')
+    ModRequestCountRollup = apps.get_model('tweets', 'ModRequestCountRollup')
+
+    # `order_by()` drops `Meta.ordering`, which would otherwise be added to the GROUP BY
+    buckets = Tweet.objects.filter(active=True) \
+        .annotate(bucket=Trunc('created_date', 'hour', tzinfo=timezone.utc)) \
+        .values('user_id', 'bucket').annotate(count=Count('id')).order_by()
+    TweetCountRollup.objects.bulk_create(
+        [TweetCountRollup(**bucket) for bucket in buckets.iterator()], batch_size=1000)
+
+    buckets = TweetModRequest.objects \
+        .annotate(bucket=Trunc('created_date', 'hour', tzinfo=timezone.utc)) \
+        .values('requester_id', 'bucket').annotate(count=Count('id')).order_by()
+    ModRequestCountRollup.objects.bulk_create([
+        ModRequestCountRollup(user_id=bucket['requester_id'], bucket=bucket['bucket'], count=bucket['count'])
+        for bucket in buckets.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tweets', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TweetCountRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ModRequestCountRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'bucket')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.1.5 on 2026-10-17 14:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tweets', '0003_count_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tweetmodrequest',
+            name='modrequest_pending_idx',
+        ),
+        migrations.AddField(
+            model_name='tweetmodrequest',
+            name='claimed_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_modification_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='tweetmodrequest',
+            name='claimed_date',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tweetmodrequest',
+            index=models.Index(condition=models.Q(approved__isnull=True), fields=['created_date', 'id'], name='modrequest_pending_idx'),
+        ),
+    ]
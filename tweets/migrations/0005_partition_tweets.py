@@ -0,0 +1,91 @@
+# Generated by Django 3.1.5 on 2026-10-17 15:08
+
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+from tweets.partitions import DEFAULT_PARTITION, TWEET_TABLE, add_months, ensure_partitions, \
+    get_partitioning_settings, partition_start
+
+UNPARTITIONED_TABLE = 'tweets_tweet_unpartitioned'
+
+# the names Django gave the constraints and indexes of the unpartitioned table
+TWEET_CONSTRAINTS_SQL = [
+    'ALTER TABLE "tweets_tweet" ADD CONSTRAINT "tweets_tweet_user_id_6c666125_fk_users_user_id" '
+    'FOREIGN KEY ("user_id") REFERENCES "users_user" ("id") DEFERRABLE INITIALLY DEFERRED',
+    'CREATE INDEX "tweets_tweet_user_id_6c666125" ON "tweets_tweet" ("user_id")',
+    'CREATE INDEX "tweet_active_user_created_idx" ON "tweets_tweet" ("user_id", "created_date" DESC, "id" DESC) '
+    'WHERE "active"',
+]
+
+
+def move_rows(cursor, source_table, target_table):
+
+    cursor.execute(f'INSERT INTO "{target_table}" SELECT * FROM "{source_table}"')
+    # the id sequence would otherwise be dropped with the source table
+    cursor.execute(f'ALTER SEQUENCE "tweets_tweet_id_seq" OWNED BY "{target_table}"."id"')
+    cursor.execute(f'DROP TABLE "{source_table}"')
+
+
+def partition_tweets(apps, schema_editor):
+
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    partitioning_settings = get_partitioning_settings()
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TWEET_TABLE}" RENAME TO "{UNPARTITIONED_TABLE}"')
+        cursor.execute(f'''
+            CREATE TABLE "{TWEET_TABLE}" (LIKE "{UNPARTITIONED_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+            PARTITION BY RANGE ("created_date")
+        ''')
+        cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TWEET_TABLE}" DEFAULT')
+
+        cursor.execute(f'SELECT MIN("created_date") FROM "{UNPARTITIONED_TABLE}"')
+        now = timezone.now()
+        until = add_months(partition_start(now, partitioning_settings['INTERVAL_MONTHS']),
+                           partitioning_settings['PREMAKE'])
+        ensure_partitions(cursor, until,
+                          since=cursor.fetchone()[0] or now)
+
+        move_rows(cursor, UNPARTITIONED_TABLE, TWEET_TABLE)
+
+        # a primary key of a partitioned table has to include the partition key
+        cursor.execute(f'ALTER TABLE "{TWEET_TABLE}" ADD CONSTRAINT "tweets_tweet_pkey" '
+                       f'PRIMARY KEY ("id", "created_date")')
+        for sql in TWEET_CONSTRAINTS_SQL:
+            cursor.execute(sql)
+
+
+def unpartition_tweets(apps, schema_editor):
+
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'''
+            CREATE TABLE "{UNPARTITIONED_TABLE}" (LIKE "{TWEET_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        ''')
+        move_rows(cursor, TWEET_TABLE, UNPARTITIONED_TABLE)
+        cursor.execute(f'ALTER TABLE "{UNPARTITIONED_TABLE}" RENAME TO "{TWEET_TABLE}"')
+
+        cursor.execute(f'ALTER TABLE "{TWEET_TABLE}" ADD CONSTRAINT "tweets_tweet_pkey" PRIMARY KEY ("id")')
+        for sql in TWEET_CONSTRAINTS_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweets', '0004_mod_request_claims'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tweetmodrequest',
+            name='tweet',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='modification_tickets', to='tweets.tweet'),
+        ),
+        migrations.RunPython(partition_tweets, unpartition_tweets),
+    ]
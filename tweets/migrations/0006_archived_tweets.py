@@ -0,0 +1,35 @@
+# Generated by Django 3.1.5 on 2026-10-17 15:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tweets', '0005_partition_tweets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTweet',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('data', models.CharField(max_length=280)),
+                ('created_date', models.DateTimeField()),
+                ('modified_date', models.DateTimeField()),
+                ('archived_date', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tweet',
+            index=models.Index(condition=models.Q(active=False), fields=['modified_date'], name='tweet_inactive_modified_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedtweet',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tweets', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.1.5 on 2026-10-17 15:11
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def backfill_search_vectors(apps, schema_editor):
+
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    Tweet = apps.get_model('tweets', 'Tweet')
+
+    # before the index is created, so it is built once rather than updated row by row
+    Tweet.objects.update(search_vector=SearchVector('data', config='english'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweets', '0006_archived_tweets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tweet',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(null=True),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='tweet',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tweet_search_vector_idx'),
+        ),
+    ]
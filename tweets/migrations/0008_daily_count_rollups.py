@@ -0,0 +1,61 @@
+# Generated by Django 3.1.5 on 2026-10-17 18:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+HOUR = 1
+DAY = 2
+
+
+def backfill_daily_rollups(apps, schema_editor):
+
+    for model_name in ('TweetCountRollup', 'ModRequestCountRollup'):
+        CountRollup = apps.get_model('tweets', model_name)
+
+        # `order_by()` drops `Meta.ordering`, which would otherwise be added to the GROUP BY
+        buckets = CountRollup.objects.filter(period=HOUR) \
+            .annotate(day=Trunc('bucket', 'day', tzinfo=timezone.utc)) \
+            .values('user_id', 'day').annotate(total=Sum('count')).order_by()
+        CountRollup.objects.bulk_create([
+            CountRollup(user_id=bucket['user_id'], period=DAY, bucket=bucket['day'], count=bucket['total'])
+            for bucket in buckets.iterator()
+        ], batch_size=1000)
+
+
+def remove_daily_rollups(apps, schema_editor):
+
+    for model_name in ('TweetCountRollup', 'ModRequestCountRollup'):
+        apps.get_model('tweets', model_name).objects.filter(period=DAY).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tweets', '0007_tweet_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='modrequestcountrollup',
+            name='period',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'hour'), (2, 'day')], default=1),
+        ),
+        migrations.AddField(
+            model_name='tweetcountrollup',
+            name='period',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'hour'), (2, 'day')], default=1),
+        ),
+        migrations.AlterUniqueTogether(
+            name='modrequestcountrollup',
+            unique_together={('user', 'period', 'bucket')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='tweetcountrollup',
+            unique_together={('user', 'period', 'bucket')},
+        ),
+        migrations.RunPython(backfill_daily_rollups, remove_daily_rollups),
+    ]
@@ -1,6 +1,15 @@
-from django.db import models
+from collections import Counter
+from datetime import timedelta
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Count, F, FloatField, Max, Q, Sum, TextField, Value
+from django.db.models.functions import Cast
 from django.utils import timezone
+from db_clients.replicas import mark_sticky, use_replica
+from .cache import tweet_cache
 from .managers import OnlyActiveManager
+from .pagination import DEFAULT_PAGE_SIZE
 import logging
 
 action_logger = logging.getLogger('action')
@@ -29,8 +38,24 @@ class Tweet(BaseModel):
     objects = OnlyActiveManager()
     naive_objects = models.Manager()
 
+    # the fields returned by the tweet list endpoints
+    LIST_FIELDS = ('id', 'data', 'created_date')
+
     active = models.BooleanField(default=True)
 
+    # `data` parsed for full-text search, written along with `data` by every method that sets it
+    search_vector = SearchVectorField(null=True)
+    SEARCH_CONFIG = 'english'
+
+    @classmethod
+    def make_search_vector(cls, data):
+        """The `search_vector` value for `data`, computed by Postgres in the statement writing it
+
+        Built from the new value, a reference to the `data` column in an UPDATE would read the old one.
+        """
+
+        return SearchVector(Value(data, output_field=TextField()), config=cls.SEARCH_CONFIG)
+
     @classmethod
     def create_new_tweet(cls, user, tweet):
         """Creates a new tweet for a user
@@ -38,12 +63,41 @@ class Tweet(BaseModel):
         :raises: Exception if any DB error
         """
 
-        tweet = cls.objects.create(user=user, data=tweet)
+        with transaction.atomic():
+            tweet = cls.objects.create(user_id=user.id, data=tweet, search_vector=cls.make_search_vector(tweet))
+            TweetCountRollup.add(user.id, tweet.created_date, 1)
+        mark_sticky(user.id)
 
         action_logger.info(f"User {user} created a new tweet {tweet}")
 
         return tweet
 
+    @classmethod
+    def bulk_create_tweets(cls, user, tweets, chunk_size=500):
+        """Creates many tweets for a user, one INSERT per `chunk_size` tweets
+
+        :param tweets: list of tweet data
+        :type tweets: list
+        :return: list of created `Tweet` objects, in the given order
+        :raises: Exception if any DB error
+        """
+
+        created_tweets = []
+        with transaction.atomic():
+            for offset in range(0, len(tweets), chunk_size):
+                created_tweets += cls.objects.bulk_create(
+                    [cls(user_id=user.id, data=tweet, search_vector=cls.make_search_vector(tweet))
+                     for tweet in tweets[offset:offset + chunk_size]])
+
+            buckets = Counter(TweetCountRollup.bucket_for(tweet.created_date) for tweet in created_tweets)
+            for bucket, count in buckets.items():
+                TweetCountRollup.add(user.id, bucket, count)
+        mark_sticky(user.id)
+
+        action_logger.info(f"User {user} created {len(created_tweets)} new tweets in bulk")
+
+        return created_tweets
+
     @classmethod
     def get_tweet(cls, user, tweet_id):
         """Gets a tweet
@@ -51,59 +105,162 @@ class Tweet(BaseModel):
         :raises: Tweet.DoesNotExist if no tweet exists
         """
 
-        tweet = cls.objects.get(id=tweet_id, user=user)
+        tweet = tweet_cache.get(user.id, tweet_id)
+        if tweet is None:
+            tweet = cls.objects.defer('search_vector').get(id=tweet_id, user_id=user.id)
+            tweet_cache.set(tweet)
+
         access_logger.info(f"User {user} accessed tweet {tweet}")
 
         return tweet
 
     @classmethod
-    def get_all_tweets(cls, user):
+    def get_all_tweets(cls, user, values=False):
         """Gets all tweets
 
+        :param values: return `LIST_FIELDS` tuples instead of `Tweet` objects
         :raises: Exception if any DB error
         """
 
-        tweets = cls.objects.filter(user=user).all()
+        tweets = cls.objects.filter(user_id=user.id).defer('search_vector')
+        if values:
+            tweets = tweets.values_list(*cls.LIST_FIELDS)
         access_logger.info(f"User {user} accessed all tweets")
 
         return tweets
 
+    @classmethod
+    def get_tweets_validators(cls, user):
+        """Gets what changes whenever a user's tweet list changes, with one aggregate query
+
+        Inactive tweets are included in the latest `modified_date`, so a delete changes it too.
+
+        :return: (latest `modified_date` or None, number of active tweets)
+        """
+
+        validators = cls.naive_objects.filter(user_id=user.id).order_by() \
+            .aggregate(last_modified=Max('modified_date'), count=Count('id', filter=Q(active=True)))
+
+        return validators['last_modified'], validators['count']
+
+    @classmethod
+    def get_tweets_page(cls, user, after=None, page_size=DEFAULT_PAGE_SIZE, values=False):
+        """Gets one page of tweets, newest first, using keyset pagination
+
+        :param after: `(created_date, id)` of the last tweet of the previous page
+        :type after: tuple
+        :type page_size: int
+        :param values: return `LIST_FIELDS` tuples instead of `Tweet` objects
+        :return: (list of `Tweet`, next `(created_date, id)` or None)
+        :raises: Exception if any DB error
+        """
+
+        tweets = cls.objects.filter(user_id=user.id).defer('search_vector')
+        if after is not None:
+            created_date, tweet_id = after
+            tweets = tweets.filter(
+                Q(created_date__lt=created_date) | Q(created_date=created_date, id__lt=tweet_id))
+
+        # `id` breaks ties between tweets created at the same instant
+        tweets = tweets.order_by('-created_date', '-id')
+        if values:
+            tweets = tweets.values_list(*cls.LIST_FIELDS)
+
+        page = list(tweets[:page_size + 1])
+        access_logger.info(f"User {user} accessed a page of tweets")
+
+        if len(page) <= page_size:
+            return page, None
+
+        page = page[:page_size]
+        if values:
+            tweet_id, _, created_date = page[-1]
+            return page, (created_date, tweet_id)
+
+        return page, (page[-1].created_date, page[-1].id)
+
     @classmethod
     def update_tweet(cls, user, tweet_id, data):
-        """Updates a tweet
+        """Updates a tweet with a single conditional UPDATE
 
         :raises: Tweet.DoesNotExist if no tweet exists
         :raises: Exception if any DB error while updating
         """
 
-        tweet = cls.objects.get(user=user, id=tweet_id)
-        tweet.data = data
-        tweet.save()
+        updated = cls.objects.filter(id=tweet_id, user_id=user.id).update(
+            data=data, search_vector=cls.make_search_vector(data), modified_date=timezone.now())
+        if not updated:
+            raise cls.DoesNotExist
+
+        tweet_cache.invalidate(user.id, tweet_id)
+        mark_sticky(user.id)
 
-        action_logger.info(f"User {user} updated tweet {tweet}")
+        action_logger.info(f"User {user} updated tweet <Tweet[ID: {tweet_id},DATA: {data[:10]}>")
 
     @classmethod
     def delete_tweet(cls, user, tweet_id):
-        """Deletes a tweet (make inactive)
+        """Deletes a tweet (make inactive) with a single conditional UPDATE
 
         :raises: Tweet.DoesNotExist if no tweet exists
         :raises: Exception if any DB error while updating state
         """
 
-        tweet = cls.objects.get(id=tweet_id, user=user)
-        tweet.active = False
-        tweet.save()
+        with transaction.atomic():
+            created_date = cls.deactivate(tweet_id, user.id)
+            if created_date is None:
+                raise cls.DoesNotExist
+
+            TweetCountRollup.add(user.id, created_date, -1)
+        tweet_cache.invalidate(user.id, tweet_id)
+        mark_sticky(user.id)
+
+        action_logger.info(f"User {user} deleted tweet <Tweet[ID: {tweet_id}>")
+
+    @classmethod
+    def deactivate(cls, tweet_id, user_id):
+        """Makes an active tweet inactive, `UPDATE ... RETURNING` saves reading the row first
+
+        :return: the tweet's `created_date`, None if no active tweet matched
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {cls._meta.db_table} SET active = false, modified_date = %s "
+                f"WHERE id = %s AND user_id = %s AND active RETURNING created_date",
+                [timezone.now(), tweet_id, user_id])
+            row = cursor.fetchone()
+
+        return row[0] if row is not None else None
+
+    @classmethod
+    def bulk_deactivate(cls, tweet_ids):
+        """Makes the active tweets among `tweet_ids` inactive with one `UPDATE ... RETURNING`
+
+        :return: list of (id, user_id, created_date) of the tweets actually made inactive
+        """
+
+        if not tweet_ids:
+            return []
 
-        action_logger.info(f"User {user} deleted tweet {tweet}")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {cls._meta.db_table} SET active = false, modified_date = %s "
+                f"WHERE id IN %s AND active RETURNING id, user_id, created_date",
+                [timezone.now(), tuple(tweet_ids)])
+            return cursor.fetchall()
 
     def update_tweet_data(self, new_data):
-        """Updates a tweet
+        """Updates an active tweet's data, writing only the changed columns
 
         :raises: Exception if any DB error while updating
         """
 
         self.data = new_data
-        self.save()
+        self.modified_date = timezone.now()
+        Tweet.objects.filter(id=self.id, user_id=self.user_id).update(
+            data=self.data, search_vector=Tweet.make_search_vector(self.data), modified_date=self.modified_date)
+        tweet_cache.invalidate(self.user_id, self.id)
+        mark_sticky(self.user_id)
 
     def make_inactive(self):
         """Makes tweet inactive
@@ -111,8 +268,87 @@ class Tweet(BaseModel):
         :raises: Exception if any DB error while updating
         """
 
+        with transaction.atomic():
+            self.modified_date = timezone.now()
+            updated = Tweet.objects.filter(id=self.id, user_id=self.user_id).update(
+                active=False, modified_date=self.modified_date)
+            if updated:
+                TweetCountRollup.add(self.user_id, self.created_date, -1)
+
         self.active = False
-        self.save()
+        tweet_cache.invalidate(self.user_id, self.id)
+        mark_sticky(self.user_id)
+
+    @classmethod
+    def archive_inactive(cls, inactive_before, batch_size):
+        """Moves up to `batch_size` tweets inactive since before `inactive_before` to `ArchivedTweet`
+
+        A single `DELETE ... RETURNING` feeding an `INSERT`, so a batch is moved atomically.
+        Tweets a `TweetModRequest` refers to stay, rows locked by a request are skipped.
+        Inactive tweets are already out of `TweetCountRollup`, which archiving leaves as is.
+
+        :type inactive_before: datetime
+        :type batch_size: int
+        :return: number of archived tweets
+        :raises: Exception if any DB error
+        """
+
+        tweet_table = cls._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                WITH archived AS (
+                    DELETE FROM {tweet_table} WHERE (id, created_date) IN (
+                        SELECT id, created_date FROM {tweet_table} tweet
+                        WHERE NOT active AND modified_date < %s AND NOT EXISTS (
+                            SELECT 1 FROM {TweetModRequest._meta.db_table} WHERE tweet_id = tweet.id
+                        )
+                        ORDER BY modified_date LIMIT %s FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING id, user_id, data, created_date, modified_date
+                )
+                INSERT INTO {ArchivedTweet._meta.db_table} (id, user_id, data, created_date, modified_date, archived_date)
+                SELECT id, user_id, data, created_date, modified_date, %s FROM archived
+            """, [inactive_before, batch_size, timezone.now()])
+            archived = cursor.rowcount
+
+        action_logger.info(f"Archived {archived} tweets inactive since before {inactive_before}")
+
+        return archived
+
+    @classmethod
+    def search_tweets(cls, query, user_id=None, after=None, page_size=DEFAULT_PAGE_SIZE):
+        """Gets one page of the active tweets matching a web search style query, best match first
+
+        Matches are found with the `search_vector` GIN index, ranked with `ts_rank` and
+        paginated on `(rank, id)`.
+
+        :param query: e.g. `"exact phrase" word -excluded`
+        :type query: str
+        :param user_id: only search the tweets of this user, all tweets when None
+        :param after: `(rank, id)` of the last tweet of the previous page
+        :type after: tuple
+        :type page_size: int
+        :return: (list of `Tweet` with a `rank`, next `(rank, id)` or None)
+        :raises: Exception if any DB error
+        """
+
+        search_query = SearchQuery(query, config=cls.SEARCH_CONFIG, search_type='websearch')
+        # `ts_rank` is a `real`, as a double it survives the round trip through the cursor exactly
+        tweets = cls.objects.filter(search_vector=search_query) \
+            .annotate(rank=Cast(SearchRank(F('search_vector'), search_query), FloatField()))
+        if user_id is not None:
+            tweets = tweets.filter(user_id=user_id)
+        if after is not None:
+            rank, tweet_id = after
+            tweets = tweets.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=tweet_id))
+
+        page = list(tweets.only('id', 'user_id', 'data', 'created_date').order_by('-rank', '-id')[:page_size + 1])
+
+        if len(page) <= page_size:
+            return page, None
+
+        page = page[:page_size]
+        return page, (page[-1].rank, page[-1].id)
 
     """ INSIGHTS """
     @classmethod
@@ -120,7 +356,8 @@ class Tweet(BaseModel):
         """Gets the tweet frequency for a User within a `start_date` and `end_date` range
         """
 
-        return Tweet.objects.filter(user__id=user_id, created_date__range=[start_date, end_date]).count()
+        return TweetCountRollup.count_range(
+            user_id, start_date, end_date, Tweet.objects.filter(user__id=user_id))
 
     def __str__(self):
 
@@ -128,6 +365,34 @@ class Tweet(BaseModel):
 
     class Meta:
         ordering = ['-created_date']
+        indexes = [
+            # serves every `OnlyActiveManager` query scoped to a user, newest first
+            models.Index(fields=['user', '-created_date', '-id'],
+                         name='tweet_active_user_created_idx', condition=Q(active=True)),
+            # finds the inactive tweets due for archival, stays small while archival keeps up
+            models.Index(fields=['modified_date'],
+                         name='tweet_inactive_modified_idx', condition=Q(active=False)),
+            GinIndex(fields=['search_vector'], name='tweet_search_vector_idx'),
+        ]
+
+
+class ArchivedTweet(models.Model):
+    """Cold storage of inactive tweets, moved out of the tweet table by `Tweet.archive_inactive`
+
+    Rows keep the tweet's ID and dates.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='archived_tweets')
+    data = models.CharField(max_length=280)
+
+    created_date = models.DateTimeField()
+    modified_date = models.DateTimeField()
+    archived_date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+
+        return f"<ArchivedTweet[ID: {self.id},DATA: {self.data[:10]}>"
 
 
 class TweetModRequest(BaseModel):
@@ -141,10 +406,17 @@ class TweetModRequest(BaseModel):
         (UPDATE, 'update'),
         (DELETE, 'delete'),
     )
+
+    ACTION_OPTIONS = {
+        'approve': True,
+        'reject': False
+    }
+
     mod_type = models.PositiveSmallIntegerField(choices=MOD_CHOICES, null=False)
 
+    # no database constraint: the partitioned tweet table is only unique on (id, created_date)
     tweet = models.ForeignKey(Tweet, on_delete=models.CASCADE,
-                              related_name='modification_tickets', null=True)
+                              related_name='modification_tickets', null=True, db_constraint=False)
 
     old_tweet_data = models.CharField(max_length=280, null=True)
     tweet_data = models.CharField(max_length=280, null=True)
@@ -157,6 +429,30 @@ class TweetModRequest(BaseModel):
     approved = models.BooleanField(null=True)
     approval_date = models.DateTimeField(null=True)
 
+    # a SuperAdmin reviewing a pending request holds it for `CLAIM_TIMEOUT`
+    claimed_by = models.ForeignKey(
+        'users.User', on_delete=models.SET_NULL, related_name='claimed_modification_requests', null=True)
+    claimed_date = models.DateTimeField(null=True)
+
+    CLAIM_TIMEOUT = timedelta(minutes=15)
+
+    class NotActionable(Exception):
+        """The request was already approved / rejected or is claimed by another SuperAdmin"""
+
+    @classmethod
+    def get_moderated_tweet(cls, admin_user, tweet_id):
+        """Gets the tweet an Admin requests a change for, from a replica when one is usable
+
+        :raises: Tweet.DoesNotExist if the tweet does not exist on the primary either
+        """
+
+        try:
+            with use_replica(admin_user.id):
+                return Tweet.objects.get(id=tweet_id)
+        except Tweet.DoesNotExist:
+            # a tweet created a moment ago may not have reached the replica yet
+            return Tweet.objects.get(id=tweet_id)
+
     @classmethod
     def new_update_request(cls, admin_user, tweet_id, tweet_data):
         """Creates a new Update modification request
@@ -168,11 +464,13 @@ class TweetModRequest(BaseModel):
         :type data: str
         """
 
-        tweet = Tweet.objects.get(id=tweet_id)
+        tweet = cls.get_moderated_tweet(admin_user, tweet_id)
         old_tweet_data = tweet.data
 
-        tweet_mod_request = cls.objects.create(
-            requester=admin_user, mod_type=cls.UPDATE, tweet=tweet, old_tweet_data=old_tweet_data, tweet_data=tweet_data)
+        with transaction.atomic():
+            tweet_mod_request = cls.objects.create(
+                requester_id=admin_user.id, mod_type=cls.UPDATE, tweet=tweet, old_tweet_data=old_tweet_data, tweet_data=tweet_data)
+            ModRequestCountRollup.add(admin_user.id, tweet_mod_request.created_date, 1)
 
         action_logger.info(f"Admin {admin_user} created new UPDATE request {tweet_mod_request}")
         return tweet_mod_request
@@ -186,9 +484,12 @@ class TweetModRequest(BaseModel):
         :type tweet_id: int
         """
 
-        tweet = Tweet.objects.get(id=tweet_id)
-        tweet_mod_request = cls.objects.create(
-            requester=admin_user, mod_type=cls.DELETE, tweet=tweet, old_tweet_data=None, tweet_data=None)
+        tweet = cls.get_moderated_tweet(admin_user, tweet_id)
+
+        with transaction.atomic():
+            tweet_mod_request = cls.objects.create(
+                requester_id=admin_user.id, mod_type=cls.DELETE, tweet=tweet, old_tweet_data=None, tweet_data=None)
+            ModRequestCountRollup.add(admin_user.id, tweet_mod_request.created_date, 1)
 
         action_logger.info(f"Admin {admin_user} created new DELETE request {tweet_mod_request}")
         return tweet_mod_request
@@ -202,26 +503,198 @@ class TweetModRequest(BaseModel):
         :type mod_request_id: int
         :param action: ("approve" / "reject")
         :type action: str
+        :return: the updated `TweetModRequest`
+        :raises: TweetModRequest.DoesNotExist if no request exists
+        :raises: TweetModRequest.NotActionable if the request is not pending or claimed by another SuperAdmin
         """
 
-        action_options = {
-            'approve': True,
-            'reject': False
-        }
+        now = timezone.now()
+
+        with transaction.atomic():
+            try:
+                # a concurrent action on the same request holds the lock until it commits,
+                # the row is then re-checked against the filter
+                tweet_mod_request = cls.objects.select_for_update().get(
+                    cls.actionable_by(super_admin_user, now), id=mod_request_id)
+            except cls.DoesNotExist:
+                if cls.objects.filter(id=mod_request_id).exists():
+                    raise cls.NotActionable
+                raise
 
-        tweet_mod_request = cls.objects.get(id=mod_request_id)
-        tweet_mod_request.apply_approval_action(
-            action_options[action])  # do the approval (approve, reject)
+            tweet_mod_request.apply_approval_action(
+                cls.ACTION_OPTIONS[action])  # do the approval (approve, reject)
 
-        tweet_mod_request.approved = action_options[action]
-        tweet_mod_request.approval_date = timezone.now()
-        tweet_mod_request.approver = super_admin_user
-        tweet_mod_request.save()
+            tweet_mod_request.approved = cls.ACTION_OPTIONS[action]
+            tweet_mod_request.approval_date = now
+            tweet_mod_request.approver_id = super_admin_user.id
+            tweet_mod_request.save()
 
         audit_logger.info(
             f"SuperAdmin {super_admin_user} invoked action {action.upper()} for tweet modification request {tweet_mod_request}"
         )
 
+        return tweet_mod_request
+
+    @classmethod
+    def bulk_mod_request_action(cls, super_admin_user, mod_request_ids, action):
+        """Applies a SuperAdmin's action to many pending TweetModificationRequests in one transaction
+
+        Requests that do not exist, were already approved / rejected, are claimed by another
+        SuperAdmin or are locked by a concurrent action are skipped, as are approvals of
+        requests whose tweet is gone with a detached partition.
+
+        :param super_admin: SuperAdmin `User` object
+        :param mod_request_ids: `TweetModRequest` object IDs
+        :type mod_request_ids: list
+        :param action: ("approve" / "reject")
+        :type action: str
+        :return: (processed IDs, skipped IDs)
+        """
+
+        approval = cls.ACTION_OPTIONS[action]
+        now = timezone.now()
+
+        with transaction.atomic():
+            tweet_mod_requests = list(
+                cls.objects.select_related('tweet').select_for_update(skip_locked=True, of=('self',))
+                .filter(cls.actionable_by(super_admin_user, now), id__in=mod_request_ids).order_by('id'))
+
+            owner_ids = set()
+            if approval:
+                tweet_mod_requests = [
+                    tweet_mod_request for tweet_mod_request in tweet_mod_requests if tweet_mod_request.tweet is not None]
+                owner_ids = cls.apply_bulk_approval(tweet_mod_requests, now)
+
+            processed_ids = [tweet_mod_request.id for tweet_mod_request in tweet_mod_requests]
+            cls.objects.filter(id__in=processed_ids).update(
+                approved=approval, approval_date=now, approver_id=super_admin_user.id, modified_date=now)
+
+        for owner_id in owner_ids:
+            mark_sticky(owner_id)
+
+        skipped_ids = sorted(set(mod_request_ids) - set(processed_ids))
+
+        audit_logger.info(
+            f"SuperAdmin {super_admin_user} invoked action {action.upper()} for {len(processed_ids)} tweet modification requests {processed_ids}"
+        )
+
+        return processed_ids, skipped_ids
+
+    @classmethod
+    def apply_bulk_approval(cls, tweet_mod_requests, now):
+        """Applies approved modification requests with bulk updates, the bulk
+        counterpart of `apply_approval_action`
+
+        :param tweet_mod_requests: `TweetModRequest` objects with their `tweet` loaded
+        :return: IDs of the users whose tweets changed
+        """
+
+        updated_tweets = {}
+        deleted_tweets = {}
+        for tweet_mod_request in tweet_mod_requests:
+            tweet = tweet_mod_request.tweet
+
+            if not tweet.active:
+                # deleted since the request was made, as `Tweet.objects` would not find it
+                continue
+
+            if tweet_mod_request.mod_type == cls.UPDATE:
+                # later requests for the same tweet win, as they would one at a time
+                tweet.data = tweet_mod_request.tweet_data
+                tweet.search_vector = Tweet.make_search_vector(tweet.data)
+                tweet.modified_date = now
+                updated_tweets[tweet.id] = tweet
+
+            elif tweet_mod_request.mod_type == cls.DELETE:
+                deleted_tweets[tweet.id] = tweet
+
+        # tweets are not locked, both UPDATEs filter on `active` so a tweet deactivated since
+        # it was read is left as is, and the rollups follow the rows actually deactivated
+        Tweet.naive_objects.filter(active=True).bulk_update(
+            updated_tweets.values(), ['data', 'search_vector', 'modified_date'], batch_size=500)
+        deactivated = Tweet.bulk_deactivate(list(deleted_tweets.keys()))
+
+        buckets = Counter(
+            (user_id, TweetCountRollup.bucket_for(created_date)) for _, user_id, created_date in deactivated)
+        for (user_id, bucket), count in buckets.items():
+            TweetCountRollup.add(user_id, bucket, -count)
+
+        for tweet in updated_tweets.values():
+            tweet_cache.invalidate(tweet.user_id, tweet.id)
+        for tweet_id, user_id, _ in deactivated:
+            tweet_cache.invalidate(user_id, tweet_id)
+
+        return {tweet.user_id for tweet in updated_tweets.values()} | {user_id for _, user_id, _ in deactivated}
+
+    @classmethod
+    def get_pending_page(cls, after=None, page_size=DEFAULT_PAGE_SIZE):
+        """Gets one page of pending modification requests, oldest first, using keyset pagination
+
+        :param after: `(created_date, id)` of the last request of the previous page
+        :type after: tuple
+        :type page_size: int
+        :return: (list of `TweetModRequest`, next `(created_date, id)` or None)
+        """
+
+        tweet_mod_requests = cls.objects.filter(approved__isnull=True)
+        if after is not None:
+            created_date, mod_request_id = after
+            tweet_mod_requests = tweet_mod_requests.filter(
+                Q(created_date__gt=created_date) | Q(created_date=created_date, id__gt=mod_request_id))
+
+        page = list(tweet_mod_requests.order_by('created_date', 'id')[:page_size + 1])
+
+        if len(page) <= page_size:
+            return page, None
+
+        page = page[:page_size]
+        return page, (page[-1].created_date, page[-1].id)
+
+    @classmethod
+    def actionable_by(cls, super_admin_user, now):
+        """Filter of the pending requests a SuperAdmin may act on: unclaimed, claimed by them
+        or with a claim older than `CLAIM_TIMEOUT`
+        """
+
+        return Q(approved__isnull=True) & (
+            Q(claimed_by__isnull=True) | Q(claimed_by_id=super_admin_user.id)
+            | Q(claimed_date__lt=now - cls.CLAIM_TIMEOUT))
+
+    @classmethod
+    def claim_pending(cls, super_admin_user, count):
+        """Claims up to `count` of the oldest pending, unclaimed modification requests
+
+        Rows locked by a concurrent claim are skipped (`SKIP LOCKED`), so several
+        SuperAdmins can drain the queue in parallel without double-processing.
+        Claims older than `CLAIM_TIMEOUT` can be taken over.
+
+        :param super_admin: SuperAdmin `User` object
+        :type count: int
+        :return: list of claimed `TweetModRequest`
+        """
+
+        now = timezone.now()
+
+        with transaction.atomic():
+            tweet_mod_requests = list(
+                cls.objects.select_for_update(skip_locked=True)
+                .filter(Q(claimed_date__isnull=True) | Q(claimed_date__lt=now - cls.CLAIM_TIMEOUT),
+                        approved__isnull=True)
+                .order_by('created_date', 'id')[:count])
+
+            cls.objects.filter(id__in=[tweet_mod_request.id for tweet_mod_request in tweet_mod_requests]) \
+                .update(claimed_by_id=super_admin_user.id, claimed_date=now)
+
+        for tweet_mod_request in tweet_mod_requests:
+            tweet_mod_request.claimed_by_id = super_admin_user.id
+            tweet_mod_request.claimed_date = now
+
+        audit_logger.info(
+            f"SuperAdmin {super_admin_user} claimed {len(tweet_mod_requests)} tweet modification requests"
+        )
+
+        return tweet_mod_requests
+
     def apply_approval_action(self, approval):
         """Applies a ModRequest action ('approve'/'reject') to a TweetModificationRequest
         Generally only accessible for a SuperAdmin
@@ -244,8 +717,136 @@ class TweetModRequest(BaseModel):
         """Gets the total number of `modification requests` made by an Admin within a `start_date` and `end_date`
         """
 
-        return cls.objects.filter(requester__id=admin_user_id, created_date__range=[start_date, end_date]).count()
+        return ModRequestCountRollup.count_range(
+            admin_user_id, start_date, end_date, cls.objects.filter(requester__id=admin_user_id))
 
     def __str__(self):
 
         return f"<TweetModRequest:{self.id}>"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['requester', 'created_date'], name='modrequest_requester_idx'),
+            # pending requests are a small, hot subset of the approval history
+            models.Index(fields=['created_date', 'id'], name='modrequest_pending_idx',
+                         condition=Q(approved__isnull=True)),
+        ]
+
+
+""" ROLLUPS """
+
+
+class BaseCountRollup(models.Model):
+    """Base model for per-user counts of rows created within an hour and within a day bucket
+
+    Kept up to date incrementally by the models it counts, so any date range is
+    answered by summing whole days, whole hours at both ends of the range, plus
+    exact counts on the partial hours at the edges.
+    """
+
+    HOUR = 1
+    DAY = 2
+
+    PERIOD_CHOICES = (
+        (HOUR, 'hour'),
+        (DAY, 'day'),
+    )
+
+    user = models.ForeignKey('users.User', on_delete=models.CASCADE, related_name='+')
+    period = models.PositiveSmallIntegerField(choices=PERIOD_CHOICES, default=HOUR)
+    bucket = models.DateTimeField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def bucket_for(cls, date, period=HOUR):
+        """Returns the start of the (UTC) hour or day bucket `date` falls in"""
+
+        bucket = date.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        if period == cls.DAY:
+            bucket = bucket.replace(hour=0)
+        return bucket
+
+    @classmethod
+    def bucket_after(cls, date, period):
+        """Returns the start of the first bucket starting at or after `date`"""
+
+        bucket = cls.bucket_for(date, period)
+        if bucket < date:
+            bucket += timedelta(days=1) if period == cls.DAY else timedelta(hours=1)
+        return bucket
+
+    @classmethod
+    def add(cls, user_id, date, delta):
+        """Adds `delta` to the hour and day buckets of `date`, creating them if needed
+        """
+
+        buckets = {cls.HOUR: cls.bucket_for(date, cls.HOUR), cls.DAY: cls.bucket_for(date, cls.DAY)}
+        updated = cls.objects.filter(
+            Q(period=cls.HOUR, bucket=buckets[cls.HOUR]) | Q(period=cls.DAY, bucket=buckets[cls.DAY]),
+            user_id=user_id).update(count=F('count') + delta)
+        if updated == len(buckets):
+            return
+
+        # an hour bucket is never created without its day bucket, a single updated row is the day
+        missing = buckets if not updated else {cls.HOUR: buckets[cls.HOUR]}
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create(
+                    [cls(user_id=user_id, period=period, bucket=bucket, count=delta)
+                     for period, bucket in missing.items()])
+        except IntegrityError:
+            # created concurrently, add to the rows that exist now and create the others
+            for period, bucket in missing.items():
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(user_id=user_id, period=period, bucket=bucket, count=delta)
+                except IntegrityError:
+                    cls.objects.filter(user_id=user_id, period=period, bucket=bucket) \
+                        .update(count=F('count') + delta)
+
+    @classmethod
+    def count_range(cls, user_id, start_date, end_date, queryset):
+        """Counts the rows of `queryset` created within `start_date` and `end_date` (inclusive)
+
+        :param queryset: the counted rows, already filtered by user
+        """
+
+        first_hour = cls.bucket_after(start_date, cls.HOUR)
+        end_hour = cls.bucket_for(end_date, cls.HOUR)
+
+        if first_hour >= end_hour:
+            return queryset.filter(created_date__range=[start_date, end_date]).count()
+
+        # whole days in [first_day, end_day), whole hours around them up to [first_hour, end_hour)
+        first_day = cls.bucket_after(first_hour, cls.DAY)
+        end_day = cls.bucket_for(end_hour, cls.DAY)
+        if first_day < end_day:
+            buckets = Q(period=cls.DAY, bucket__gte=first_day, bucket__lt=end_day) \
+                | Q(period=cls.HOUR, bucket__gte=first_hour, bucket__lt=first_day) \
+                | Q(period=cls.HOUR, bucket__gte=end_day, bucket__lt=end_hour)
+        else:
+            buckets = Q(period=cls.HOUR, bucket__gte=first_hour, bucket__lt=end_hour)
+
+        bucket_count = cls.objects.filter(buckets, user_id=user_id).aggregate(total=Sum('count'))['total']
+        # exact counts on both edges
+        head_count = queryset.filter(created_date__gte=start_date, created_date__lt=first_hour).count()
+        tail_count = queryset.filter(created_date__gte=end_hour, created_date__lte=end_date).count()
+
+        return (bucket_count or 0) + head_count + tail_count
+
+
+class TweetCountRollup(BaseCountRollup):
+    """Hourly and daily counts of active tweets per user"""
+
+    class Meta:
+        unique_together = ('user', 'period', 'bucket')
+
+
+class ModRequestCountRollup(BaseCountRollup):
+    """Hourly and daily counts of modification requests per admin"""
+
+    class Meta:
+        unique_together = ('user', 'period', 'bucket')
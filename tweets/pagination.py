@@ -0,0 +1,57 @@
+import base64
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_date, tweet_id):
+    """Builds an opaque cursor from a `(created_date, id)` keyset position
+
+    :type created_date: datetime
+    :type tweet_id: int
+    :return: str
+    """
+
+    raw = f"{created_date.isoformat()}|{tweet_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Decodes an opaque cursor into a `(created_date, id)` keyset position
+
+    :raises: ValueError if the cursor is malformed
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_date, tweet_id = raw.split('|')
+        return datetime.fromisoformat(created_date), int(tweet_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def encode_rank_cursor(rank, tweet_id):
+    """Builds an opaque cursor from a `(rank, id)` search results position
+
+    :type rank: float
+    :type tweet_id: int
+    :return: str
+    """
+
+    raw = f"{rank!r}|{tweet_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_rank_cursor(cursor):
+    """Decodes an opaque cursor into a `(rank, id)` search results position
+
+    :raises: ValueError if the cursor is malformed
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        rank, tweet_id = raw.split('|')
+        return float(rank), int(tweet_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,135 @@
+import calendar
+import re
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+TWEET_TABLE = 'tweets_tweet'
+DEFAULT_PARTITION = 'tweets_tweet_default'
+
+_BOUNDS_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def get_partitioning_settings():
+
+    return dict({
+        'INTERVAL_MONTHS': 1,
+        'PREMAKE': 3,
+    }, **getattr(settings, 'TWEET_PARTITIONING', {}))
+
+
+def add_months(date, months):
+    """`date` moved by `months`, the day is clamped to the end of shorter months"""
+
+    month = date.month - 1 + months
+    year, month = date.year + month // 12, month % 12 + 1
+    return date.replace(year=year, month=month, day=min(date.day, calendar.monthrange(year, month)[1]))
+
+
+def partition_start(date, interval_months):
+    """First instant of the partition holding `date`, intervals are aligned on January 1st"""
+
+    date = timezone.localtime(date, timezone.utc)
+    month = (date.month - 1) // interval_months * interval_months + 1
+    return datetime(date.year, month, 1, tzinfo=timezone.utc)
+
+
+def partition_name(start):
+    return f"{TWEET_TABLE}_p{start:%Y_%m}"
+
+
+def list_partitions(cursor):
+    """Range partitions of the tweet table, oldest first
+
+    :return: list of (name, start, end), the default partition excluded
+    """
+
+    cursor.execute("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = %s
+    """, [TWEET_TABLE])
+
+    partitions = []
+    for name, bounds in cursor.fetchall():
+        match = _BOUNDS_RE.search(bounds)
+        if match:
+            start, end = (parse_bound(bound) for bound in match.groups())
+            partitions.append((name, start, end))
+
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def parse_bound(bound):
+    """Parses a `timestamptz` partition bound, e.g. `2021-01-01 00:00:00+00`"""
+
+    if re.search(r'[+-]\d\d$', bound):
+        bound += ':00'
+    return datetime.fromisoformat(bound).astimezone(timezone.utc)
+
+
+def is_partitioned(cursor):
+
+    cursor.execute("SELECT relkind FROM pg_class WHERE relname = %s", [TWEET_TABLE])
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def create_partition(cursor, start, end):
+    """Creates the `[start, end)` partition, moving the rows the default partition holds for it
+
+    :return: partition name
+    """
+
+    name = partition_name(start)
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TWEET_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+    cursor.execute(f"""
+        WITH moved AS (
+            DELETE FROM "{DEFAULT_PARTITION}" WHERE created_date >= %s AND created_date < %s RETURNING *
+        )
+        INSERT INTO "{name}" SELECT * FROM moved
+    """, [start, end])
+    cursor.execute(
+        f'ALTER TABLE "{TWEET_TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', [start, end])
+
+    return name
+
+
+def ensure_partitions(cursor, until, since=None, interval_months=None):
+    """Creates the missing partitions after the newest existing one, or from `since`, up to `until`
+
+    :return: names of the created partitions
+    """
+
+    interval_months = interval_months or get_partitioning_settings()['INTERVAL_MONTHS']
+    partitions = list_partitions(cursor)
+
+    start = partitions[-1][2] if partitions else partition_start(since or until, interval_months)
+    created = []
+    while start <= until:
+        end = add_months(start, interval_months)
+        created.append(create_partition(cursor, start, end))
+        start = end
+
+    return created
+
+
+def archive_name(name):
+    return name.replace(f"{TWEET_TABLE}_p", f"{TWEET_TABLE}_archive_", 1)
+
+
+def detach_partition(cursor, name):
+    """Detaches a partition from the tweet table, its rows are kept in a standalone archive table
+
+    :return: archive table name
+    """
+
+    archive_table = archive_name(name)
+
+    cursor.execute(f'ALTER TABLE "{TWEET_TABLE}" DETACH PARTITION "{name}"')
+    cursor.execute(f'ALTER TABLE "{name}" RENAME TO "{archive_table}"')
+
+    return archive_table
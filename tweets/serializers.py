@@ -1,16 +1,98 @@
+from django.utils import timezone
 from rest_framework import serializers
+from logger.profiling import timed
 from .models import Tweet, TweetModRequest
 
 
-class TweetSerializer(serializers.ModelSerializer):
+class TimedSerializerMixin():
+    """Reports the time spent building `data` as the `serialize` phase of profiled requests
+    """
+
+    @property
+    def data(self):
+
+        with timed('serialize'):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class BoundedListSerializer(serializers.ListSerializer):
+    """`ListSerializer` rejecting more than `max_length` items before validating any of them
+    """
+
+    default_error_messages = {
+        'max_length': 'Ensure this field has no more than {max_length} elements.'
+    }
+
+    def __init__(self, *args, max_length=None, **kwargs):
+        self.max_length = max_length
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+
+        if self.max_length is not None and isinstance(data, list) and len(data) > self.max_length:
+            self.fail('max_length', max_length=self.max_length)
+
+        return super().to_internal_value(data)
+
+
+class TweetSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Tweet
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'data', 'created_date')
 
 
-class TweetModRequestSerializer(serializers.ModelSerializer):
+class TweetSearchResultSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+
+    rank = serializers.FloatField()
+
+    class Meta:
+        model = Tweet
+        list_serializer_class = TimedListSerializer
+        fields = ('id', 'user_id', 'data', 'created_date', 'rank')
+
+
+class TweetModRequestSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = TweetModRequest
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'created_date', 'requester_id')
+
+
+class PendingTweetModRequestSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+
+    class Meta:
+        model = TweetModRequest
+        list_serializer_class = TimedListSerializer
+        fields = ('id', 'created_date', 'requester_id', 'mod_type', 'tweet_id',
+                  'old_tweet_data', 'tweet_data', 'claimed_by_id', 'claimed_date')
+
+
+def serialize_tweet_rows(rows):
+    """Fast path equivalent of `TweetSerializer(many=True).data` for `Tweet.LIST_FIELDS` rows
+
+    Skips building model instances and running each field through the serializer,
+    datetimes are formatted like DRF's ISO 8601 `DateTimeField` output.
+    """
+
+    with timed('serialize'):
+        current_timezone = timezone.get_current_timezone()
+        convert = current_timezone != timezone.utc
+
+        tweets = []
+        for tweet_id, data, created_date in rows:
+            if convert:
+                created_date = created_date.astimezone(current_timezone)
+            created_date = created_date.isoformat()
+            if created_date.endswith('+00:00'):
+                created_date = created_date[:-6] + 'Z'
+
+            tweets.append({'id': tweet_id, 'data': data, 'created_date': created_date})
+
+        return tweets
@@ -1,3 +1,1087 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from db_clients import replicas
+from db_clients.replicas import ReplicaRouter, check_sticky_cache, make_sticky_key, mark_sticky, use_replica
+from users.models import User
+from users.tokens import RoleRefreshToken
+from .cache import LocalMemoryLRUBackend, tweet_cache
+from .models import ArchivedTweet, Tweet, TweetCountRollup, TweetModRequest
+from .pagination import decode_cursor, encode_cursor
+from .partitions import DEFAULT_PARTITION, add_months, create_partition, list_partitions, partition_start
+from oslash_project.renderers import FastJSONRenderer
+from .serializers import BoundedListSerializer, TweetSerializer, serialize_tweet_rows
+
+
+class TweetQueryCountTests(APITestCase):
+    """Pins the number of SQL statements each endpoint runs, so query regressions fail CI
+
+    Requests are force-authenticated, the counts exclude authentication. Each test
+    runs in a transaction, so `transaction.atomic` blocks show up as SAVEPOINT statements.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.user = User.objects.create_user('query_user', password='query_user')
+        cls.admin = User.objects.create_user('query_admin', password='query_admin', role=User.ADMIN)
+        cls.super_admin = User.objects.create_user(
+            'query_super_admin', password='query_super_admin', role=User.SUPER_ADMIN)
+
+    def setUp(self):
+
+        tweet_cache.reset()
+        self.tweet = Tweet.create_new_tweet(self.user, 'first tweet')
+        self.client.force_authenticate(self.user)
+
+    def test_create_tweet(self):
+
+        # INSERT tweet, UPDATE rollup bucket
+        with self.assertNumQueries(2 + 2):
+            response = self.client.post(reverse('create_tweet'), {'data': 'new tweet'})
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_get_tweet(self):
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('get_tweet', args=[self.tweet.id]))
+        self.assertEqual(response.status_code, 200)
+
+        # served from the tweet cache
+        with self.assertNumQueries(0):
+            self.client.get(reverse('get_tweet', args=[self.tweet.id]))
+
+    def test_get_all_tweets(self):
+
+        # the validators aggregate behind ETag / Last-Modified, run on every request, then the list
+        with self.assertNumQueries(1 + 1):
+            response = self.client.get(reverse('get_all_tweets'))
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(1 + 1):
+            response = self.client.get(reverse('get_all_tweets'), {'page_size': 10})
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_tweet(self):
+
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('update_tweet', args=[self.tweet.id]), {'data': 'edited'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Tweet.objects.get(id=self.tweet.id).data, 'edited')
+
+    def test_update_missing_tweet(self):
+
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('update_tweet', args=[self.tweet.id + 1000]), {'data': 'edited'})
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_delete_tweet(self):
+
+        # UPDATE ... RETURNING, UPDATE rollup bucket
+        with self.assertNumQueries(2 + 2):
+            response = self.client.delete(reverse('delete_tweet', args=[self.tweet.id]))
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(1 + 3):
+            response = self.client.delete(reverse('delete_tweet', args=[self.tweet.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_new_update_request(self):
+
+        self.client.force_authenticate(self.admin)
+
+        # SELECT tweet, INSERT request, UPDATE rollup bucket, INSERT missing rollup bucket
+        with self.assertNumQueries(4 + 4):
+            response = self.client.post(reverse('new_tweet_update_request', args=[self.tweet.id]), {'data': 'edit'})
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_bulk_mod_request_action(self):
+
+        mod_requests = [TweetModRequest.new_update_request(self.admin, self.tweet.id, f'edit {i}') for i in range(5)]
+        self.client.force_authenticate(self.super_admin)
+
+        # SELECT ... FOR UPDATE, bulk UPDATE tweets, UPDATE requests
+        with self.assertNumQueries(3 + 2):
+            response = self.client.post(reverse('bulk_tweet_modification_action'), {
+                'ids': [mod_request.id for mod_request in mod_requests], 'action': 'approve'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Tweet.objects.get(id=self.tweet.id).data, 'edit 4')
+
+    def test_insights(self):
+
+        self.client.force_authenticate(self.super_admin)
+        end_date = timezone.now() + timedelta(minutes=1)
+        dates = {
+            'start_date': (end_date - timedelta(days=2)).strftime('%Y-%m-%dT%H:%M'),
+            'end_date': end_date.strftime('%Y-%m-%dT%H:%M'),
+        }
+
+        # SUM over whole buckets, exact COUNT on both partial edges
+        with self.assertNumQueries(3):
+            response = self.client.post(reverse('user_freq_insights', args=[self.user.id]), dates)
+
+        self.assertEqual(response.data['tweet_frequency'], 1)
+
+
+class FastTweetSerializationTests(APITestCase):
+
+    def test_matches_tweet_serializer(self):
+
+        user = User.objects.create_user('serialization_user')
+        for i in range(3):
+            Tweet.create_new_tweet(user, f'tweet {i}')
+
+        rows = Tweet.get_all_tweets(user, values=True)
+        tweets = Tweet.get_all_tweets(user)
+
+        self.assertEqual(serialize_tweet_rows(rows), TweetSerializer(tweets, many=True).data)
+
+    def test_renderer_matches_json_renderer(self):
+
+        data = {
+            'aware': datetime(2026, 10, 17, 15, 30, 1, 250, tzinfo=timezone.utc),
+            'naive': datetime(2026, 10, 17, 15, 30),
+            'errors': {'ids': {0: ['A valid integer is required.']}},
+            'separators': 'a\u2028b\u2029c',
+        }
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=4', {}),
+            JSONRenderer().render(data, 'application/json; indent=4', {}))
+
+
+class ConditionalGetTests(APITestCase):
+
+    def setUp(self):
+
+        tweet_cache.reset()
+        self.user = User.objects.create_user('conditional_user')
+        self.tweet = Tweet.create_new_tweet(self.user, 'tweet')
+        self.client.force_authenticate(self.user)
+
+    def test_get_all_tweets_not_modified(self):
+
+        response = self.client.get(reverse('get_all_tweets'))
+        self.assertEqual(response.status_code, 200)
+
+        # a single aggregate query, no list fetch
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('get_all_tweets'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_get_all_tweets_detached(self):
+
+        etag = self.client.get(reverse('get_all_tweets'))['ETag']
+        # as a detached partition, the tweet is gone without a modification
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {Tweet._meta.db_table} WHERE id = %s', [self.tweet.id])
+
+        response = self.client.get(reverse('get_all_tweets'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+    def test_get_all_tweets_modified(self):
+
+        etag = self.client.get(reverse('get_all_tweets'))['ETag']
+        Tweet.delete_tweet(self.user, self.tweet.id)
+
+        response = self.client.get(reverse('get_all_tweets'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+    def test_get_all_tweets_modified_since(self):
+
+        newest_tweet = Tweet.create_new_tweet(self.user, 'newest tweet')
+        Tweet.naive_objects.filter(user=self.user).update(modified_date=timezone.now() - timedelta(hours=1))
+        last_modified = self.client.get(reverse('get_all_tweets'))['Last-Modified']
+
+        response = self.client.get(reverse('get_all_tweets'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        # deleting a tweet older than the latest modified one still changes the list
+        Tweet.delete_tweet(self.user, self.tweet.id)
+        response = self.client.get(reverse('get_all_tweets'), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([tweet['id'] for tweet in response.data], [newest_tweet.id])
+
+    def test_get_tweet_not_modified(self):
+
+        etag = self.client.get(reverse('get_tweet', args=[self.tweet.id]))['ETag']
+
+        response = self.client.get(reverse('get_tweet', args=[self.tweet.id]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        Tweet.update_tweet(self.user, self.tweet.id, 'edited')
+        response = self.client.get(reverse('get_tweet', args=[self.tweet.id]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data'], 'edited')
+
+
+class AsyncTweetViewTests(APITestCase):
+    """The async views authenticate themselves, requests carry a real access token"""
+
+    def setUp(self):
+
+        tweet_cache.reset()
+        self.user = User.objects.create_user('async_user')
+        self.tweet = Tweet.create_new_tweet(self.user, 'tweet')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(self.user).access_token}')
+
+    def test_crud(self):
+
+        response = self.client.post(reverse('async_create_tweet'), {'data': 'async tweet'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        tweet_id = response.json()['id']
+
+        response = self.client.get(reverse('async_get_tweet', args=[tweet_id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data'], 'async tweet')
+
+        response = self.client.post(reverse('async_update_tweet', args=[tweet_id]), {'data': 'edited'})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.delete(reverse('async_delete_tweet', args=[tweet_id]))
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse('async_get_all_tweets'), {'page_size': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([tweet['id'] for tweet in response.json()['results']], [self.tweet.id])
+
+    def test_matches_sync_view(self):
+
+        sync_response = self.client.get(reverse('get_all_tweets'))
+        async_response = self.client.get(reverse('async_get_all_tweets'))
+
+        self.assertEqual(async_response.content, sync_response.content)
+        self.assertEqual(async_response['ETag'], sync_response['ETag'])
+
+    def test_errors(self):
+
+        response = self.client.get(reverse('async_get_tweet', args=[0]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Invalid tweet id'})
+
+        response = self.client.post(reverse('async_create_tweet'), {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('data', response.json())
+
+        response = self.client.get(reverse('async_create_tweet'))
+        self.assertEqual(response.status_code, 405)
+
+        self.client.credentials()
+        response = self.client.get(reverse('async_get_all_tweets'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('WWW-Authenticate', response)
+
+
+@override_settings(REPLICA_ROUTING={'REPLICAS': ['replica_test'], 'MAX_LAG_SECONDS': 5})
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.set_lag(0.5)
+
+    def tearDown(self):
+
+        replicas._replica_status.clear()
+
+    def set_lag(self, lag):
+        replicas._replica_status['replica_test'] = (time.monotonic(), lag)
+
+    def test_reads_in_block(self):
+
+        self.assertEqual(self.router.db_for_read(Tweet), 'default')
+
+        with use_replica(1):
+            self.assertEqual(self.router.db_for_read(Tweet), 'replica_test')
+
+        self.assertEqual(self.router.db_for_write(Tweet), 'default')
+
+    def test_read_your_writes(self):
+
+        mark_sticky(1)
+
+        with use_replica(1):
+            self.assertEqual(self.router.db_for_read(Tweet), 'default')
+
+        with use_replica(2):
+            self.assertEqual(self.router.db_for_read(Tweet), 'replica_test')
+
+    def test_sticky_cache_check(self):
+
+        self.assertEqual([error.id for error in check_sticky_cache(None)], ['db_clients.E001'])
+
+        with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache', 'LOCATION': 'cache:11211'}}):
+            self.assertEqual(check_sticky_cache(None), [])
+
+        with override_settings(REPLICA_ROUTING={'REPLICAS': []}):
+            self.assertEqual(check_sticky_cache(None), [])
+
+    def test_lagging_or_unreachable_replica(self):
+
+        self.set_lag(30)
+        with use_replica(1):
+            self.assertEqual(self.router.db_for_read(Tweet), 'default')
+
+        self.set_lag(None)
+        with use_replica(1):
+            self.assertEqual(self.router.db_for_read(Tweet), 'default')
+
+
+class TweetPartitionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.user = User.objects.create_user('partition_user', password='partition_user')
+
+    def setUp(self):
+
+        if connection.vendor != 'postgresql':
+            self.skipTest('Tweet partitioning needs PostgreSQL')
+
+    def test_partition_bounds(self):
+
+        date = timezone.now().replace(year=2021, month=11, day=20)
+        self.assertEqual(add_months(date, 3).date().isoformat(), '2022-02-20')
+        self.assertEqual(partition_start(date, 3).date().isoformat(), '2021-10-01')
+
+    def test_month_end(self):
+
+        self.assertEqual(add_months(datetime(2026, 11, 30, tzinfo=timezone.utc), 3).date().isoformat(), '2027-02-28')
+        self.assertEqual(add_months(datetime(2026, 5, 31, tzinfo=timezone.utc), -1).date().isoformat(), '2026-04-30')
+        self.assertEqual(add_months(datetime(2028, 1, 31, tzinfo=timezone.utc), 1).date().isoformat(), '2028-02-29')
+
+        month_end = datetime(2026, 5, 31, 23, 30, tzinfo=timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=month_end):
+            call_command('manage_tweet_partitions', '--dry-run', '--detach-after-months', '1', stdout=StringIO())
+
+    def test_tweets_go_to_their_month(self):
+
+        tweet = Tweet.create_new_tweet(self.user, 'partitioned tweet')
+
+        with connection.cursor() as cursor:
+            partitions = list_partitions(cursor)
+            name = next(name for name, start, end in partitions if start <= tweet.created_date < end)
+            cursor.execute(f'SELECT id FROM "{name}"')
+            self.assertIn((tweet.id,), cursor.fetchall())
+
+    def test_create_partition_moves_default_rows(self):
+
+        with connection.cursor() as cursor:
+            start = list_partitions(cursor)[-1][2]
+            tweet = Tweet.create_new_tweet(self.user, 'future tweet')
+            Tweet.naive_objects.filter(id=tweet.id).update(created_date=start)
+
+            name = create_partition(cursor, start, add_months(start, 1))
+
+            cursor.execute(f'SELECT COUNT(*) FROM "{DEFAULT_PARTITION}"')
+            self.assertEqual(cursor.fetchone()[0], 0)
+            cursor.execute(f'SELECT id FROM "{name}"')
+            self.assertEqual(cursor.fetchall(), [(tweet.id,)])
+
+
+class TweetArchivalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.user = User.objects.create_user('archival_user', password='archival_user')
+        cls.admin = User.objects.create_user('archival_admin', password='archival_admin', role=User.ADMIN)
+
+    def setUp(self):
+
+        if connection.vendor != 'postgresql':
+            self.skipTest('Tweet archival needs PostgreSQL')
+
+    def deleted_tweet(self, data, days_ago):
+
+        tweet = Tweet.create_new_tweet(self.user, data)
+        Tweet.delete_tweet(self.user, tweet.id)
+        Tweet.naive_objects.filter(id=tweet.id).update(modified_date=timezone.now() - timedelta(days=days_ago))
+        return tweet
+
+    def test_archive_inactive(self):
+
+        old_tweet = self.deleted_tweet('old deleted tweet', 40)
+        recent_tweet = self.deleted_tweet('recent deleted tweet', 1)
+        live_tweet = Tweet.create_new_tweet(self.user, 'live tweet')
+
+        self.assertEqual(Tweet.archive_inactive(timezone.now() - timedelta(days=30), 100), 1)
+
+        self.assertEqual(ArchivedTweet.objects.get(id=old_tweet.id).data, 'old deleted tweet')
+        self.assertEqual(set(Tweet.naive_objects.values_list('id', flat=True)), {recent_tweet.id, live_tweet.id})
+
+    def test_mod_request_tweets_stay(self):
+
+        tweet = Tweet.create_new_tweet(self.user, 'moderated tweet')
+        mod_request = TweetModRequest.new_delete_request(self.admin, tweet.id)
+        mod_request.apply_approval_action(True)
+        Tweet.naive_objects.filter(id=tweet.id).update(modified_date=timezone.now() - timedelta(days=40))
+
+        self.assertEqual(Tweet.archive_inactive(timezone.now(), 100), 0)
+        self.assertEqual(TweetModRequest.objects.get(id=mod_request.id).tweet, tweet)
+
+    def test_batches(self):
+
+        for i in range(5):
+            self.deleted_tweet(f"deleted tweet {i}", 40)
+
+        call_command('archive_inactive_tweets', batch_size=2, batch_pause=0, stdout=StringIO())
+
+        self.assertEqual(ArchivedTweet.objects.count(), 5)
+        self.assertFalse(Tweet.naive_objects.exists())
+
+
+class TweetSearchTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.user = User.objects.create_user('search_user', password='search_user')
+        cls.other_user = User.objects.create_user('search_other_user', password='search_other_user')
+        cls.admin = User.objects.create_user('search_admin', password='search_admin', role=User.ADMIN)
+        cls.super_admin = User.objects.create_user(
+            'search_super_admin', password='search_super_admin', role=User.SUPER_ADMIN)
+
+    def setUp(self):
+
+        if connection.vendor != 'postgresql':
+            self.skipTest('Tweet search needs PostgreSQL')
+
+        tweet_cache.reset()
+        self.client.force_authenticate(self.user)
+
+    def search(self, **params):
+
+        response = self.client.get(reverse('search_tweets'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_ranking_and_scope(self):
+
+        best = Tweet.create_new_tweet(self.user, 'Cats, cats and more cats')
+        other = Tweet.create_new_tweet(self.user, 'A dog chasing a cat')
+        Tweet.create_new_tweet(self.user, 'Nothing to see here')
+        Tweet.create_new_tweet(self.other_user, 'My cat sleeps all day')
+
+        results = self.search(q='cats')['results']
+        self.assertEqual([result['id'] for result in results], [best.id, other.id])
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+
+    def test_admin_scope(self):
+
+        Tweet.create_new_tweet(self.user, 'the weather is lovely')
+        Tweet.create_new_tweet(self.other_user, 'lovely weather again')
+
+        response = self.client.get(reverse('search_tweets'), {'q': 'weather', 'scope': 'all'})
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(len(self.search(q='weather', scope='all')['results']), 2)
+
+    def test_keyset_pagination(self):
+
+        tweets = [Tweet.create_new_tweet(self.user, f'paginated search tweet {i}') for i in range(5)]
+
+        ids, cursor = [], None
+        while True:
+            page = self.search(q='paginated', page_size=2, **({'cursor': cursor} if cursor else {}))
+            ids += [result['id'] for result in page['results']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(sorted(ids), sorted(tweet.id for tweet in tweets))
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_kept_in_sync(self):
+
+        tweet = Tweet.create_new_tweet(self.user, 'original words')
+        Tweet.update_tweet(self.user, tweet.id, 'replacement words')
+
+        self.assertEqual(self.search(q='original')['results'], [])
+        self.assertEqual(len(self.search(q='replacement')['results']), 1)
+
+        mod_request = TweetModRequest.new_update_request(self.admin, tweet.id, 'moderated words')
+        TweetModRequest.mod_request_action(self.super_admin, mod_request.id, 'approve')
+        self.assertEqual(len(self.search(q='moderated')['results']), 1)
+
+        mod_request = TweetModRequest.new_update_request(self.admin, tweet.id, 'bulk moderated words')
+        TweetModRequest.bulk_mod_request_action(self.super_admin, [mod_request.id], 'approve')
+        self.assertEqual(len(self.search(q='bulk')['results']), 1)
+
+        Tweet.delete_tweet(self.user, tweet.id)
+        self.assertEqual(self.search(q='words')['results'], [])
+
+
+class KeysetPaginationTests(APITestCase):
+
+    def setUp(self):
+
+        self.user = User.objects.create_user('pagination_user')
+        self.tweets = [Tweet.create_new_tweet(self.user, f'tweet {i}') for i in range(5)]
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_round_trip(self):
+
+        position = (timezone.now(), 42)
+        self.assertEqual(decode_cursor(encode_cursor(*position)), position)
+
+        with self.assertRaises(ValueError):
+            decode_cursor('not a cursor')
+
+    def test_invalid_cursor(self):
+
+        response = self.client.get(reverse('get_all_tweets'), {'cursor': 'not a cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_page_boundaries(self):
+
+        # two tweets created at the same instant are ordered by id
+        Tweet.naive_objects.filter(id=self.tweets[3].id).update(created_date=self.tweets[2].created_date)
+        expected_ids = list(
+            Tweet.objects.filter(user=self.user).order_by('-created_date', '-id').values_list('id', flat=True))
+
+        ids, pages, params = [], 0, {'page_size': 2}
+        while True:
+            response = self.client.get(reverse('get_all_tweets'), params)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+
+            ids += [tweet['id'] for tweet in response.data['results']]
+            pages += 1
+            if response.data['next_cursor'] is None:
+                break
+            params = {'page_size': 2, 'cursor': response.data['next_cursor']}
+
+        self.assertEqual(ids, expected_ids)
+        self.assertEqual(pages, 3)
+
+    def test_exact_last_page(self):
+
+        tweets, next_position = Tweet.get_tweets_page(self.user, page_size=5)
+
+        self.assertEqual(len(tweets), 5)
+        self.assertIsNone(next_position)
+
+
+class HotQueryIndexTests(TestCase):
+    """The hot queries are served by the partial and composite indexes, sequential scans are
+    disabled so the tiny test tables do not make the planner prefer them
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.user = User.objects.create_user('index_user')
+        cls.admin = User.objects.create_user('index_admin', role=User.ADMIN)
+        tweet = Tweet.create_new_tweet(cls.user, 'tweet')
+        TweetModRequest.new_delete_request(cls.admin, tweet.id)
+
+    def setUp(self):
+
+        if connection.vendor != 'postgresql':
+            self.skipTest('Query plans are checked on PostgreSQL')
+
+    def plan(self, queryset):
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_active_user_tweets(self):
+
+        start_date = timezone.now() - timedelta(days=30)
+        queries = [
+            Tweet.objects.filter(user_id=self.user.id).order_by('-created_date', '-id')[:50],
+            Tweet.objects.filter(user_id=self.user.id, created_date__range=[start_date, timezone.now()]),
+        ]
+
+        for queryset in queries:
+            # each partition holds its own copy of `tweet_active_user_created_idx`
+            self.assertIn('user_id_created_date_id_idx', self.plan(queryset))
+
+    def test_mod_requests(self):
+
+        start_date = timezone.now() - timedelta(days=30)
+
+        self.assertIn('modrequest_requester_idx', self.plan(TweetModRequest.objects.filter(
+            requester_id=self.admin.id, created_date__range=[start_date, timezone.now()])))
+        self.assertIn('modrequest_pending_idx', self.plan(
+            TweetModRequest.objects.filter(approved__isnull=True).order_by('created_date', 'id')[:50]))
+
+
+class TweetCacheTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.user = User.objects.create_user('cache_user')
+        cls.admin = User.objects.create_user('cache_admin', role=User.ADMIN)
+        cls.super_admin = User.objects.create_user('cache_super_admin', role=User.SUPER_ADMIN)
+
+    def setUp(self):
+
+        cache.clear()
+        tweet_cache.reset()
+        self.tweet = Tweet.create_new_tweet(self.user, 'cached tweet')
+        # fills the cache
+        Tweet.get_tweet(self.user, self.tweet.id)
+
+    def cached_data(self):
+
+        tweet = tweet_cache.get(self.user.id, self.tweet.id)
+        return tweet.data if tweet is not None else None
+
+    def test_hit(self):
+
+        self.assertEqual(self.cached_data(), 'cached tweet')
+        with self.assertNumQueries(0):
+            self.assertEqual(Tweet.get_tweet(self.user, self.tweet.id).data, 'cached tweet')
+
+    def test_stats(self):
+
+        self.client.force_authenticate(self.super_admin)
+        before = self.client.get(reverse('tweet_cache_insights')).data
+
+        Tweet.get_tweet(self.user, self.tweet.id)
+        tweet_cache.invalidate(self.user.id, self.tweet.id)
+        Tweet.get_tweet(self.user, self.tweet.id)
+
+        after = self.client.get(reverse('tweet_cache_insights')).data
+        self.assertEqual((after['hits'] - before['hits'], after['misses'] - before['misses']), (1, 1))
+        self.assertEqual(after['backend'], 'DjangoCacheBackend')
+
+    def test_invalidated_on_update(self):
+
+        Tweet.update_tweet(self.user, self.tweet.id, 'edited')
+
+        self.assertIsNone(self.cached_data())
+        self.assertEqual(Tweet.get_tweet(self.user, self.tweet.id).data, 'edited')
+
+    def test_invalidated_on_delete(self):
+
+        Tweet.delete_tweet(self.user, self.tweet.id)
+
+        self.assertIsNone(self.cached_data())
+        with self.assertRaises(Tweet.DoesNotExist):
+            Tweet.get_tweet(self.user, self.tweet.id)
+
+    def test_invalidated_on_approvals(self):
+
+        mod_request = TweetModRequest.new_update_request(self.admin, self.tweet.id, 'moderated')
+        TweetModRequest.mod_request_action(self.super_admin, mod_request.id, 'approve')
+        self.assertIsNone(self.cached_data())
+
+        self.assertEqual(Tweet.get_tweet(self.user, self.tweet.id).data, 'moderated')
+        tweet_cache.reset()
+        cache.clear()
+        Tweet.get_tweet(self.user, self.tweet.id)
+
+        mod_requests = [
+            TweetModRequest.new_update_request(self.admin, self.tweet.id, 'bulk moderated'),
+            TweetModRequest.new_delete_request(self.admin, self.tweet.id),
+        ]
+        TweetModRequest.bulk_mod_request_action(
+            self.super_admin, [mod_request.id for mod_request in mod_requests], 'approve')
+        self.assertIsNone(self.cached_data())
+
+    def test_stale_read_is_not_cached(self):
+
+        # a read misses and fetches the row, then a write invalidates before the read caches it
+        stale_tweet = Tweet.objects.get(id=self.tweet.id)
+        Tweet.update_tweet(self.user, self.tweet.id, 'edited')
+        tweet_cache.set(stale_tweet)
+
+        self.assertIsNone(self.cached_data())
+        self.assertEqual(Tweet.get_tweet(self.user, self.tweet.id).data, 'edited')
+
+    def test_replica_read_is_not_cached(self):
+
+        tweet = Tweet.objects.get(id=self.tweet.id)
+        tweet._state.db = 'replica_0'
+
+        with override_settings(TWEET_CACHE={'BACKEND': 'lru', 'TIMEOUT': 60}):
+            tweet_cache.reset()
+            tweet_cache.set(tweet)
+            self.assertIsNone(self.cached_data())
+
+            tweet._state.db = 'default'
+            tweet_cache.set(tweet)
+            self.assertEqual(self.cached_data(), 'cached tweet')
+        tweet_cache.reset()
+
+    def test_lru_expiry(self):
+
+        backend = LocalMemoryLRUBackend(max_entries=2, timeout=0.05)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.set('c', 3)
+
+        # evicted as least recently used
+        self.assertIsNone(backend.get('a'))
+        self.assertFalse(backend.add('b', 20))
+        time.sleep(0.06)
+        self.assertIsNone(backend.get('c'))
+        self.assertTrue(backend.add('b', 20))
+
+
+class CountRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.user = User.objects.create_user('rollup_user', password='rollup_user')
+
+    def create_tweet_at(self, created_date):
+
+        with mock.patch('django.utils.timezone.now', return_value=created_date):
+            return Tweet.create_new_tweet(self.user, f'created at {created_date}')
+
+    def assert_counts_match(self, dates):
+
+        for start_date in dates:
+            for end_date in dates:
+                if start_date > end_date:
+                    continue
+                with self.subTest(start_date=start_date, end_date=end_date):
+                    self.assertEqual(
+                        Tweet.get_tweet_frequency(self.user.id, start_date, end_date),
+                        Tweet.objects.filter(
+                            user=self.user, created_date__range=[start_date, end_date]).count())
+
+    def test_count_range_edges(self):
+
+        day = datetime(2026, 10, 10, tzinfo=timezone.utc)
+        created_dates = [
+            day - timedelta(days=2, hours=13, minutes=30),
+            day - timedelta(days=1),
+            day - timedelta(hours=9),
+            day - timedelta(seconds=1),
+            day,
+            day + timedelta(minutes=30),
+            day + timedelta(hours=1),
+            day + timedelta(days=1, hours=5, minutes=59, seconds=59),
+        ]
+        tweets = [self.create_tweet_at(created_date) for created_date in created_dates]
+        Tweet.delete_tweet(self.user, tweets[2].id)
+
+        dates = created_dates + [
+            day - timedelta(days=3),
+            day - timedelta(hours=1),
+            day + timedelta(minutes=59, seconds=59),
+            day + timedelta(days=1),
+            day + timedelta(days=3, minutes=1),
+        ]
+        self.assert_counts_match(sorted(dates))
+
+    def test_daily_buckets(self):
+
+        day = datetime(2026, 10, 10, tzinfo=timezone.utc)
+        for hours in (1, 2, 23):
+            self.create_tweet_at(day + timedelta(hours=hours))
+        self.create_tweet_at(day + timedelta(days=1))
+
+        self.assertEqual(TweetCountRollup.objects.get(
+            user=self.user, period=TweetCountRollup.DAY, bucket=day).count, 3)
+        self.assertEqual(TweetCountRollup.objects.filter(
+            user=self.user, period=TweetCountRollup.HOUR, bucket__gte=day,
+            bucket__lt=day + timedelta(days=1)).count(), 3)
+
+
+class BulkCreateTweetsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.user = User.objects.create_user('bulk_user', password='bulk_user')
+
+    def setUp(self):
+
+        self.client.force_authenticate(self.user)
+
+    def test_create(self):
+
+        response = self.client.post(reverse('bulk_create_tweets'), {
+            'tweets': [{'data': 'first'}, {'data': 'second'}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([result['status'] for result in response.data['results']], [201, 201])
+        self.assertEqual([result['tweet']['data'] for result in response.data['results']], ['first', 'second'])
+        self.assertEqual(list(Tweet.objects.filter(user=self.user).values_list('data', flat=True).order_by('id')),
+                         ['first', 'second'])
+
+    def test_partially_valid(self):
+
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('bulk_create_tweets'), {
+                'tweets': [{'data': 'first'}, {'data': 'x' * 281}, {}, 'x'],
+            }, format='json')
+
+        # the errors of each item, in order, and nothing created
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()['tweets']
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(errors[0], {})
+        self.assertIn('data', errors[1])
+        self.assertIn('data', errors[2])
+        self.assertIn('non_field_errors', errors[3])
+        self.assertFalse(Tweet.objects.filter(user=self.user).exists())
+
+    def test_too_many(self):
+
+        serializer = BoundedListSerializer(child=TweetSerializer(), max_length=2, data=[{'data': 'tweet'}] * 3)
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors, ['Ensure this field has no more than 2 elements.'])
+
+    def test_invalid_list_items(self):
+
+        self.client.force_authenticate(User.objects.create_user('bulk_super_admin', role=User.SUPER_ADMIN))
+        response = self.client.post(reverse('bulk_tweet_modification_action'),
+                                    {'ids': ['x'], 'action': 'approve'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('0', response.json()['ids'])
+
+
+class BulkApprovalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.user = User.objects.create_user('approval_user', password='approval_user')
+        cls.admin = User.objects.create_user('approval_admin', password='approval_admin', role=User.ADMIN)
+        cls.super_admin = User.objects.create_user(
+            'approval_super_admin', password='approval_super_admin', role=User.SUPER_ADMIN)
+
+    def setUp(self):
+
+        tweet_cache.reset()
+        self.tweet = Tweet.create_new_tweet(self.user, 'moderated tweet')
+
+    def rollup_count(self):
+
+        return TweetCountRollup.objects.get(
+            user=self.user, period=TweetCountRollup.HOUR,
+            bucket=TweetCountRollup.bucket_for(self.tweet.created_date)).count
+
+    def loaded_requests(self, *mod_requests):
+
+        return list(TweetModRequest.objects.select_related('tweet').filter(
+            id__in=[mod_request.id for mod_request in mod_requests]).order_by('id'))
+
+    def test_approve_delete(self):
+
+        mod_request = TweetModRequest.new_delete_request(self.admin, self.tweet.id)
+        processed_ids, _ = TweetModRequest.bulk_mod_request_action(self.super_admin, [mod_request.id], 'approve')
+
+        self.assertEqual(processed_ids, [mod_request.id])
+        self.assertFalse(Tweet.naive_objects.get(id=self.tweet.id).active)
+        self.assertEqual(self.rollup_count(), 0)
+
+    def test_approval_marks_owner_sticky(self):
+
+        mod_requests = [
+            TweetModRequest.new_update_request(self.admin, self.tweet.id, 'edited'),
+            TweetModRequest.new_delete_request(self.admin, self.tweet.id),
+        ]
+
+        with override_settings(REPLICA_ROUTING={'REPLICAS': ['replica_test']}):
+            cache.clear()
+            TweetModRequest.mod_request_action(self.super_admin, mod_requests[0].id, 'approve')
+            self.assertTrue(cache.get(make_sticky_key(self.user.id)))
+
+            cache.clear()
+            TweetModRequest.bulk_mod_request_action(self.super_admin, [mod_requests[1].id], 'approve')
+            self.assertTrue(cache.get(make_sticky_key(self.user.id)))
+
+    def test_delete_of_tweet_deleted_meanwhile(self):
+
+        tweet_mod_requests = self.loaded_requests(
+            TweetModRequest.new_delete_request(self.admin, self.tweet.id),
+            TweetModRequest.new_delete_request(self.admin, self.tweet.id))
+        Tweet.delete_tweet(self.user, self.tweet.id)
+
+        TweetModRequest.apply_bulk_approval(tweet_mod_requests, timezone.now())
+
+        # counted once, by the user's own delete
+        self.assertEqual(self.rollup_count(), 0)
+
+    def test_update_of_tweet_deleted_meanwhile(self):
+
+        tweet_mod_requests = self.loaded_requests(
+            TweetModRequest.new_update_request(self.admin, self.tweet.id, 'edited'))
+        Tweet.delete_tweet(self.user, self.tweet.id)
+
+        TweetModRequest.apply_bulk_approval(tweet_mod_requests, timezone.now())
+
+        tweet = Tweet.naive_objects.get(id=self.tweet.id)
+        self.assertFalse(tweet.active)
+        self.assertEqual(tweet.data, 'moderated tweet')
+
+    def test_request_of_detached_tweet(self):
+
+        orphan = TweetModRequest.new_update_request(self.admin, self.tweet.id, 'edited')
+        other_tweet = Tweet.create_new_tweet(self.user, 'other tweet')
+        mod_request = TweetModRequest.new_delete_request(self.admin, other_tweet.id)
+        # as if its partition was detached, no cascade and the request keeps pointing to the row
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {Tweet._meta.db_table} WHERE id = %s', [self.tweet.id])
+
+        processed_ids, skipped_ids = TweetModRequest.bulk_mod_request_action(
+            self.super_admin, [orphan.id, mod_request.id], 'approve')
+
+        self.assertEqual((processed_ids, skipped_ids), ([mod_request.id], [orphan.id]))
+        self.assertIsNone(TweetModRequest.objects.get(id=orphan.id).approved)
+        self.assertFalse(Tweet.naive_objects.get(id=other_tweet.id).active)
+
+    def test_update_then_delete(self):
+
+        tweet_mod_requests = self.loaded_requests(
+            TweetModRequest.new_update_request(self.admin, self.tweet.id, 'edited'),
+            TweetModRequest.new_delete_request(self.admin, self.tweet.id))
+
+        TweetModRequest.apply_bulk_approval(tweet_mod_requests, timezone.now())
+
+        tweet = Tweet.naive_objects.get(id=self.tweet.id)
+        self.assertEqual((tweet.active, tweet.data), (False, 'edited'))
+        self.assertEqual(self.rollup_count(), 0)
+
+
+class ModRequestClaimTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+
+        cls.user = User.objects.create_user('claim_user', password='claim_user')
+        cls.admin = User.objects.create_user('claim_admin', password='claim_admin', role=User.ADMIN)
+        cls.super_admin = User.objects.create_user(
+            'claim_super_admin', password='claim_super_admin', role=User.SUPER_ADMIN)
+        cls.other_super_admin = User.objects.create_user(
+            'claim_other_super_admin', password='claim_other_super_admin', role=User.SUPER_ADMIN)
+
+    def setUp(self):
+
+        tweet_cache.reset()
+        self.tweet = Tweet.create_new_tweet(self.user, 'claimed tweet')
+        self.mod_requests = [
+            TweetModRequest.new_update_request(self.admin, self.tweet.id, f'edit {i}') for i in range(3)]
+
+    def test_claim_pending(self):
+
+        claimed = TweetModRequest.claim_pending(self.super_admin, 2)
+        other_claimed = TweetModRequest.claim_pending(self.other_super_admin, 2)
+
+        self.assertEqual(claimed, self.mod_requests[:2])
+        self.assertEqual(other_claimed, self.mod_requests[2:])
+        self.assertEqual(TweetModRequest.claim_pending(self.other_super_admin, 2), [])
+
+    def test_expired_claim_is_taken_over(self):
+
+        TweetModRequest.claim_pending(self.super_admin, 3)
+        TweetModRequest.objects.filter(id=self.mod_requests[0].id).update(
+            claimed_date=timezone.now() - TweetModRequest.CLAIM_TIMEOUT - timedelta(seconds=1))
+
+        self.assertEqual(TweetModRequest.claim_pending(self.other_super_admin, 3), self.mod_requests[:1])
+        TweetModRequest.mod_request_action(self.other_super_admin, self.mod_requests[0].id, 'approve')
+
+    def test_action_on_request_claimed_by_other(self):
+
+        TweetModRequest.claim_pending(self.super_admin, 1)
+        mod_request_id = self.mod_requests[0].id
+
+        with self.assertRaises(TweetModRequest.NotActionable):
+            TweetModRequest.mod_request_action(self.other_super_admin, mod_request_id, 'approve')
+        self.assertEqual(
+            TweetModRequest.bulk_mod_request_action(self.other_super_admin, [mod_request_id], 'approve'),
+            ([], [mod_request_id]))
+        self.assertEqual(Tweet.objects.get(id=self.tweet.id).data, 'claimed tweet')
+
+        tweet_mod_request = TweetModRequest.mod_request_action(self.super_admin, mod_request_id, 'approve')
+        self.assertTrue(tweet_mod_request.approved)
+        self.assertEqual(Tweet.objects.get(id=self.tweet.id).data, 'edit 0')
+
+    def test_action_on_handled_request(self):
+
+        mod_request_id = self.mod_requests[0].id
+        TweetModRequest.mod_request_action(self.super_admin, mod_request_id, 'reject')
+        self.client.force_authenticate(self.super_admin)
+
+        response = self.client.post(
+            reverse('tweet_modification_action', args=[mod_request_id]), {'action': 'approve'})
+
+        self.assertEqual(response.status_code, 403)
+        self.assertIs(TweetModRequest.objects.get(id=mod_request_id).approved, False)
+        self.assertEqual(Tweet.objects.get(id=self.tweet.id).data, 'claimed tweet')
+
+        response = self.client.post(reverse('tweet_modification_action', args=[0]), {'action': 'approve'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ModRequestSkipLockedTests(TransactionTestCase):
+    """Concurrent transactions need their own connections, hence a `TransactionTestCase`"""
+
+    def setUp(self):
+
+        if connection.vendor != 'postgresql':
+            self.skipTest('SKIP LOCKED needs PostgreSQL')
+
+        tweet_cache.reset()
+        user = User.objects.create_user('locked_user', password='locked_user')
+        admin = User.objects.create_user('locked_admin', password='locked_admin', role=User.ADMIN)
+        self.super_admin = User.objects.create_user(
+            'locked_super_admin', password='locked_super_admin', role=User.SUPER_ADMIN)
+        tweet = Tweet.create_new_tweet(user, 'locked tweet')
+        self.mod_requests = [TweetModRequest.new_delete_request(admin, tweet.id) for _ in range(2)]
+
+    def hold_lock(self, mod_request_id, locked, release):
+
+        try:
+            with transaction.atomic():
+                list(TweetModRequest.objects.select_for_update().filter(id=mod_request_id))
+                locked.set()
+                release.wait(5)
+        finally:
+            connection.close()
+
+    def test_locked_requests_are_skipped(self):
+
+        locked, release = threading.Event(), threading.Event()
+        thread = threading.Thread(target=self.hold_lock, args=(self.mod_requests[0].id, locked, release))
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(5))
+
+            self.assertEqual(TweetModRequest.claim_pending(self.super_admin, 2), self.mod_requests[1:])
+            self.assertEqual(
+                TweetModRequest.bulk_mod_request_action(
+                    self.super_admin, [mod_request.id for mod_request in self.mod_requests], 'reject'),
+                ([self.mod_requests[1].id], [self.mod_requests[0].id]))
+        finally:
+            release.set()
+            thread.join()
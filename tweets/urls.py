@@ -1,17 +1,28 @@
 from django.urls import path, include
-from .views import CreateTweet, GetTweet, GetAllTweets, DeleteTweet, UpdateTweet, \
+from .views import CreateTweet, BulkCreateTweets, GetTweet, GetAllTweets, SearchTweets, DeleteTweet, UpdateTweet, \
     NewTweetUpdateRequest, NewTweetDeleteRequest, \
-    TweetModRequestAction, \
-    TweetFrequencyInsights, AdminRequestInsights
+    TweetModRequestAction, BulkTweetModRequestAction, \
+    PendingTweetModRequests, ClaimTweetModRequests, \
+    TweetFrequencyInsights, AdminRequestInsights, TweetCacheInsights, \
+    async_create_tweet, async_get_tweet, async_get_all_tweets, async_update_tweet, async_delete_tweet
 
 urlpatterns = [
     # regular users
     path('tweet/create', CreateTweet.as_view(), name='create_tweet'),
+    path('tweet/bulk_create', BulkCreateTweets.as_view(), name='bulk_create_tweets'),
     path('tweet/get_all', GetAllTweets.as_view(), name='get_all_tweets'),
     path('tweet/get/<int:tweet_id>', GetTweet.as_view(), name='get_tweet'),
+    path('tweet/search', SearchTweets.as_view(), name='search_tweets'),
     path('tweet/update/<int:tweet_id>', UpdateTweet.as_view(), name='update_tweet'),
     path('tweet/delete/<int:tweet_id>', DeleteTweet.as_view(), name='delete_tweet'),
 
+    # regular users, async views for ASGI deployments
+    path('async/tweet/create', async_create_tweet, name='async_create_tweet'),
+    path('async/tweet/get_all', async_get_all_tweets, name='async_get_all_tweets'),
+    path('async/tweet/get/<int:tweet_id>', async_get_tweet, name='async_get_tweet'),
+    path('async/tweet/update/<int:tweet_id>', async_update_tweet, name='async_update_tweet'),
+    path('async/tweet/delete/<int:tweet_id>', async_delete_tweet, name='async_delete_tweet'),
+
     # admins
     path('tweet/admin/update/<int:tweet_id>',
          NewTweetUpdateRequest.as_view(), name='new_tweet_update_request'),
@@ -21,10 +32,19 @@ urlpatterns = [
     # superadmins mod request action
     path('tweet/superadmin/action/<int:tweet_mod_request_id>',
          TweetModRequestAction.as_view(), name='tweet_modification_action'),
+    path('tweet/superadmin/bulk_action',
+         BulkTweetModRequestAction.as_view(), name='bulk_tweet_modification_action'),
+
+    # superadmins pending mod request queue
+    path('tweet/superadmin/queue',
+         PendingTweetModRequests.as_view(), name='pending_tweet_modification_requests'),
+    path('tweet/superadmin/queue/claim',
+         ClaimTweetModRequests.as_view(), name='claim_tweet_modification_requests'),
 
     # superadmins insights
     path('tweet/insights/user_freq/<int:user_id>',
          TweetFrequencyInsights.as_view(), name='user_freq_insights'),
     path('tweet/insights/admin_count/<int:admin_user_id>',
          AdminRequestInsights.as_view(), name='admin_user_count_insights'),
+    path('tweet/insights/cache', TweetCacheInsights.as_view(), name='tweet_cache_insights'),
 ]
@@ -1,17 +1,60 @@
+import hashlib
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import serializers
 from rest_framework import exceptions as drf_exceptions
 
+from db_clients.replicas import replica_reads
+from oslash_project.async_api import async_api_view, get_request_data, json_response
 from users.permissions import IsAdminUser, IsSuperAdminUser
 from .models import Tweet, TweetModRequest
-from .serializers import TweetSerializer, TweetModRequestSerializer
+from .serializers import TweetSerializer, TweetModRequestSerializer, PendingTweetModRequestSerializer, \
+    TweetSearchResultSerializer, BoundedListSerializer, serialize_tweet_rows
+from .cache import tweet_cache
+from .pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, decode_cursor, encode_rank_cursor, \
+    decode_rank_cursor
 
 import logging
 logger = logging.getLogger("django")
 
+MAX_BULK_TWEETS = 1000
+MAX_BULK_MOD_REQUESTS = 1000
+MAX_CLAIMED_MOD_REQUESTS = 100
+
+
+class ConditionalGetMixin():
+    """Answers `If-None-Match` / `If-Modified-Since` with a 304 before serializing anything
+    """
+
+    def make_etag(self, *validators):
+
+        return quote_etag(hashlib.md5('|'.join(str(validator) for validator in validators).encode()).hexdigest())
+
+    def get_not_modified_response(self, request, etag, last_modified):
+        """Returns a 304 response if the client's copy is current, None otherwise"""
+
+        last_modified_timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified_timestamp)
+        if response is not None:
+            # a 304 repeats the validators the 200 would have carried
+            self.add_validators(response, etag, last_modified)
+
+        return response
+
+    def add_validators(self, response, etag, last_modified):
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+
+        return response
+
 
 class CreateTweet(APIView):
     """Creates a new Tweet
@@ -39,12 +82,42 @@ class CreateTweet(APIView):
         return Response(serialized_data, status=201)
 
 
-class GetTweet(APIView):
+class BulkCreateTweets(APIView):
+    """Creates many Tweets at once, returning a result per item
+
+    The list is validated as a whole, a 400 carries the errors of each item in order
+    and nothing is created
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    class InputSerializer(serializers.Serializer):
+
+        tweets = BoundedListSerializer(child=TweetSerializer(), allow_empty=False, max_length=MAX_BULK_TWEETS)
+
+    def post(self, request, *args, **kwargs):
+
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            tweets = Tweet.bulk_create_tweets(
+                request.user, [item['data'] for item in serializer.validated_data['tweets']])
+        except Exception as e:
+            logger.error(str(e))
+            raise drf_exceptions.APIException('Internal server error', 'error')
+
+        results = [{'status': 201, 'tweet': TweetSerializer(tweet).data} for tweet in tweets]
+        return Response({'created': len(tweets), 'results': results}, status=201)
+
+
+class GetTweet(ConditionalGetMixin, APIView):
     """Gets a Tweet by it's ID
     """
 
     permission_classes = (IsAuthenticated,)
 
+    @replica_reads
     def get(self, request, *args, tweet_id, ** kwargs):
 
         try:
@@ -57,27 +130,151 @@ class GetTweet(APIView):
             logger.error(str(e))
             raise drf_exceptions.APIException('Internal server error', 'error')
 
+        etag = self.make_etag(tweet.id, tweet.modified_date)
+        not_modified_response = self.get_not_modified_response(request, etag, tweet.modified_date)
+        if not_modified_response is not None:
+            return not_modified_response
+
         serialized_data = TweetSerializer(tweet).data
-        return Response(serialized_data, status=200)
+        return self.add_validators(Response(serialized_data, status=200), etag, tweet.modified_date)
 
 
-class GetAllTweets(APIView):
+class GetAllTweets(ConditionalGetMixin, APIView):
     """Gets all tweets for a User
+
+    Every response runs the `get_tweets_validators` aggregate ahead of the list query,
+    a second query, so a conditional request is answered without fetching the list.
+    `Last-Modified` does not move when `manage_tweet_partitions` detaches a range of
+    tweets, the ETag does as the count changes, clients should revalidate with `If-None-Match`.
     """
 
     permission_classes = (IsAuthenticated,)
 
+    class InputSerializer(serializers.Serializer):
+
+        cursor = serializers.CharField(required=False)
+        page_size = serializers.IntegerField(
+            required=False, min_value=1, max_value=MAX_PAGE_SIZE, default=DEFAULT_PAGE_SIZE)
+
+        def validate_cursor(self, cursor):
+
+            try:
+                return decode_cursor(cursor)
+            except ValueError:
+                raise serializers.ValidationError('Invalid cursor provided')
+
+    @replica_reads
     def get(self, request, *args, ** kwargs):
 
         try:
-            tweets = Tweet.get_all_tweets(user=request.user)
+            last_modified, count = Tweet.get_tweets_validators(user=request.user)
+
+        except Exception as e:
+            logger.error(str(e))
+            raise drf_exceptions.APIException('Internal server error', 'error')
+
+        # the page requested is part of the validator, pages share `Last-Modified`
+        etag = self.make_etag(last_modified, count, request.GET.urlencode())
+        not_modified_response = self.get_not_modified_response(request, etag, last_modified)
+        if not_modified_response is not None:
+            return not_modified_response
+
+        # keyset-paginated mode is opt-in, the plain list is kept for existing clients
+        if 'cursor' in request.GET or 'page_size' in request.GET:
+            return self.add_validators(self.get_page(request), etag, last_modified)
+
+        fast_serialization = getattr(settings, 'FAST_TWEET_SERIALIZATION', False)
+        try:
+            tweets = Tweet.get_all_tweets(user=request.user, values=fast_serialization)
 
         except Exception as e:
             logger.error(str(e))
             raise drf_exceptions.APIException('Internal server error', 'error')
 
-        serialized_tweets = TweetSerializer(tweets, many=True)
-        return Response(serialized_tweets.data, status=200)
+        response = Response(self.serialize(tweets, fast_serialization), status=200)
+        return self.add_validators(response, etag, last_modified)
+
+    def get_page(self, request):
+
+        serializer = self.InputSerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+
+        fast_serialization = getattr(settings, 'FAST_TWEET_SERIALIZATION', False)
+        try:
+            tweets, next_position = Tweet.get_tweets_page(
+                user=request.user,
+                after=serializer.validated_data.get('cursor'),
+                page_size=serializer.validated_data['page_size'],
+                values=fast_serialization)
+
+        except Exception as e:
+            logger.error(str(e))
+            raise drf_exceptions.APIException('Internal server error', 'error')
+
+        response = {
+            'results': self.serialize(tweets, fast_serialization),
+            'next_cursor': encode_cursor(*next_position) if next_position else None
+        }
+        return Response(response, status=200)
+
+    def serialize(self, tweets, fast_serialization):
+
+        if fast_serialization:
+            return serialize_tweet_rows(tweets)
+
+        return TweetSerializer(tweets, many=True).data
+
+
+class SearchTweets(APIView):
+    """Full-text search of the User's tweets, or of every tweet for Admins and Super Admins
+    """
+
+    permission_classes = (IsAuthenticated,)
+
+    class InputSerializer(serializers.Serializer):
+
+        q = serializers.CharField(max_length=280)
+        scope = serializers.ChoiceField(choices=('own', 'all'), default='own')
+        cursor = serializers.CharField(required=False)
+        page_size = serializers.IntegerField(
+            required=False, min_value=1, max_value=MAX_PAGE_SIZE, default=DEFAULT_PAGE_SIZE)
+
+        def validate_cursor(self, cursor):
+
+            try:
+                return decode_rank_cursor(cursor)
+            except ValueError:
+                raise serializers.ValidationError('Invalid cursor provided')
+
+    @replica_reads
+    def get(self, request, *args, **kwargs):
+
+        serializer = self.InputSerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+
+        if serializer.validated_data['scope'] == 'all':
+            if not (request.user.is_admin or request.user.is_super_admin):
+                raise drf_exceptions.PermissionDenied('Only Admins can search all tweets')
+            user_id = None
+        else:
+            user_id = request.user.id
+
+        try:
+            tweets, next_position = Tweet.search_tweets(
+                serializer.validated_data['q'],
+                user_id=user_id,
+                after=serializer.validated_data.get('cursor'),
+                page_size=serializer.validated_data['page_size'])
+
+        except Exception as e:
+            logger.error(str(e))
+            raise drf_exceptions.APIException('Internal server error', 'error')
+
+        response = {
+            'results': TweetSearchResultSerializer(tweets, many=True).data,
+            'next_cursor': encode_rank_cursor(*next_position) if next_position else None
+        }
+        return Response(response, status=200)
 
 
 class UpdateTweet(APIView):
@@ -208,6 +405,9 @@ class TweetModRequestAction(UpdateTweet):
 
         except TweetModRequest.DoesNotExist:
             raise drf_exceptions.NotFound('Invalid tweet modification request id', 'not_found')
+        except TweetModRequest.NotActionable:
+            raise drf_exceptions.PermissionDenied(
+                'Tweet modification request already handled or claimed by another SuperAdmin', 'not_actionable')
         except Exception as e:
             logger.error(str(e))
             raise drf_exceptions.APIException('Internal server error', 'error')
@@ -216,6 +416,94 @@ class TweetModRequestAction(UpdateTweet):
         return Response(serialized_data, status=201)
 
 
+class BulkTweetModRequestAction(APIView):
+    """View to allow a Super Admin approve/reject many Tweet modification requests at once
+    """
+
+    permission_classes = (IsAuthenticated, IsSuperAdminUser)
+
+    class InputSerializer(TweetModRequestAction.InputSerializer):
+
+        ids = serializers.ListField(
+            child=serializers.IntegerField(), allow_empty=False, max_length=MAX_BULK_MOD_REQUESTS)
+
+    def post(self, request, *args, **kwargs):
+
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            processed_ids, skipped_ids = TweetModRequest.bulk_mod_request_action(
+                super_admin_user=request.user, mod_request_ids=serializer.validated_data['ids'],
+                action=serializer.validated_data['action'])
+
+        except Exception as e:
+            logger.error(str(e))
+            raise drf_exceptions.APIException('Internal server error', 'error')
+
+        response = {
+            'processed': processed_ids,
+            'skipped': skipped_ids
+        }
+        return Response(response, status=200)
+
+
+class PendingTweetModRequests(APIView):
+    """View to allow a Super Admin list the pending Tweet modification requests, oldest first
+    """
+
+    permission_classes = (IsAuthenticated, IsSuperAdminUser)
+
+    InputSerializer = GetAllTweets.InputSerializer
+
+    def get(self, request, *args, **kwargs):
+
+        serializer = self.InputSerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            tweet_mod_requests, next_position = TweetModRequest.get_pending_page(
+                after=serializer.validated_data.get('cursor'),
+                page_size=serializer.validated_data['page_size'])
+
+        except Exception as e:
+            logger.error(str(e))
+            raise drf_exceptions.APIException('Internal server error', 'error')
+
+        response = {
+            'results': PendingTweetModRequestSerializer(tweet_mod_requests, many=True).data,
+            'next_cursor': encode_cursor(*next_position) if next_position else None
+        }
+        return Response(response, status=200)
+
+
+class ClaimTweetModRequests(APIView):
+    """View to allow a Super Admin claim the oldest pending Tweet modification requests for review
+    """
+
+    permission_classes = (IsAuthenticated, IsSuperAdminUser)
+
+    class InputSerializer(serializers.Serializer):
+
+        count = serializers.IntegerField(min_value=1, max_value=MAX_CLAIMED_MOD_REQUESTS, default=10)
+
+    def post(self, request, *args, **kwargs):
+
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            tweet_mod_requests = TweetModRequest.claim_pending(
+                super_admin_user=request.user, count=serializer.validated_data['count'])
+
+        except Exception as e:
+            logger.error(str(e))
+            raise drf_exceptions.APIException('Internal server error', 'error')
+
+        serialized_data = PendingTweetModRequestSerializer(tweet_mod_requests, many=True).data
+        return Response(serialized_data, status=200)
+
+
 """ SUPERADMIN INSIGHTS """
 
 
@@ -230,6 +518,7 @@ class TweetFrequencyInsights(APIView):
         start_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M")
         end_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M")
 
+    @replica_reads
     def post(self, request, *args, user_id, **kwargs):
 
         serializer = self.InputSerializer(data=request.data)
@@ -261,6 +550,7 @@ class AdminRequestInsights(APIView):
         start_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M")
         end_date = serializers.DateTimeField(format="%Y-%m-%dT%H:%M")
 
+    @replica_reads
     def post(self, request, *args, admin_user_id, **kwargs):
 
         serializer = self.InputSerializer(data=request.data)
@@ -279,3 +569,143 @@ class AdminRequestInsights(APIView):
             'mod_requests_count': mod_requests_count
         }
         return Response(response, status=200)
+
+
+class TweetCacheInsights(APIView):
+    """View to allow a Super Admin to get the single tweet cache hit / miss counters,
+    summed over every worker in Prometheus multiprocess mode
+    """
+
+    permission_classes = (IsAuthenticated, IsSuperAdminUser)
+
+    def get(self, request, *args, **kwargs):
+
+        return Response(tweet_cache.stats(), status=200)
+
+
+# Async counterparts of the tweet CRUD views, served without holding a thread under ASGI.
+# ORM calls run through `sync_to_async`, validation and serialization are shared with the views above.
+
+@async_api_view(['POST'])
+async def async_create_tweet(request):
+
+    serializer = CreateTweet.InputSerializer(data=get_request_data(request))
+    serializer.is_valid(raise_exception=True)
+
+    tweet_data = serializer.validated_data['data']
+    try:
+        tweet = await sync_to_async(Tweet.create_new_tweet)(request.user, tweet_data)
+    except Exception as e:
+        logger.error(str(e))
+        raise drf_exceptions.APIException('Internal server error', 'error')
+
+    return json_response(TweetSerializer(tweet).data, status=201)
+
+
+@async_api_view(['GET'])
+async def async_get_tweet(request, tweet_id):
+
+    try:
+        tweet = await sync_to_async(Tweet.get_tweet)(tweet_id=tweet_id, user=request.user)
+
+    except Tweet.DoesNotExist:
+        raise drf_exceptions.NotFound('Invalid tweet id', 'not_found')
+
+    except Exception as e:
+        logger.error(str(e))
+        raise drf_exceptions.APIException('Internal server error', 'error')
+
+    conditional_get = ConditionalGetMixin()
+    etag = conditional_get.make_etag(tweet.id, tweet.modified_date)
+    not_modified_response = conditional_get.get_not_modified_response(request, etag, tweet.modified_date)
+    if not_modified_response is not None:
+        return not_modified_response
+
+    response = json_response(TweetSerializer(tweet).data, status=200)
+    return conditional_get.add_validators(response, etag, tweet.modified_date)
+
+
+@async_api_view(['GET'])
+async def async_get_all_tweets(request):
+
+    view = GetAllTweets()
+    try:
+        last_modified, count = await sync_to_async(Tweet.get_tweets_validators)(user=request.user)
+
+    except Exception as e:
+        logger.error(str(e))
+        raise drf_exceptions.APIException('Internal server error', 'error')
+
+    etag = view.make_etag(last_modified, count, request.GET.urlencode())
+    not_modified_response = view.get_not_modified_response(request, etag, last_modified)
+    if not_modified_response is not None:
+        return not_modified_response
+
+    fast_serialization = getattr(settings, 'FAST_TWEET_SERIALIZATION', False)
+
+    if 'cursor' in request.GET or 'page_size' in request.GET:
+        serializer = GetAllTweets.InputSerializer(data=request.GET)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            tweets, next_position = await sync_to_async(Tweet.get_tweets_page)(
+                user=request.user,
+                after=serializer.validated_data.get('cursor'),
+                page_size=serializer.validated_data['page_size'],
+                values=fast_serialization)
+
+        except Exception as e:
+            logger.error(str(e))
+            raise drf_exceptions.APIException('Internal server error', 'error')
+
+        data = {
+            'results': view.serialize(tweets, fast_serialization),
+            'next_cursor': encode_cursor(*next_position) if next_position else None
+        }
+        return view.add_validators(json_response(data, status=200), etag, last_modified)
+
+    try:
+        # evaluated in the ORM thread, the queryset is lazy
+        tweets = await sync_to_async(lambda: list(Tweet.get_all_tweets(user=request.user, values=fast_serialization)))()
+
+    except Exception as e:
+        logger.error(str(e))
+        raise drf_exceptions.APIException('Internal server error', 'error')
+
+    response = json_response(view.serialize(tweets, fast_serialization), status=200)
+    return view.add_validators(response, etag, last_modified)
+
+
+@async_api_view(['POST'])
+async def async_update_tweet(request, tweet_id):
+
+    serializer = UpdateTweet.InputSerializer(data=get_request_data(request))
+    serializer.is_valid(raise_exception=True)
+
+    tweet_data = serializer.validated_data['data']
+
+    try:
+        await sync_to_async(Tweet.update_tweet)(request.user, tweet_id, tweet_data)
+
+    except Tweet.DoesNotExist:
+        raise drf_exceptions.NotFound('Invalid tweet id', 'not_found')
+    except Exception as e:
+        logger.error(str(e))
+        raise drf_exceptions.APIException('Internal server error', 'error')
+
+    return json_response(status=200)
+
+
+@async_api_view(['DELETE'])
+async def async_delete_tweet(request, tweet_id):
+
+    try:
+        await sync_to_async(Tweet.delete_tweet)(user=request.user, tweet_id=tweet_id)
+
+    except Tweet.DoesNotExist:
+        raise drf_exceptions.NotFound('Invalid tweet id', 'not_found')
+    except Exception as e:
+        logger.error(str(e))
+        raise drf_exceptions.APIException('Internal server error', 'error')
+
+    return json_response(status=200)
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.5 on 2026-10-17 14:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_auto_20210108_1035'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='token_revocation', serialize=False, to='users.user')),
+                ('revoked_before', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.db import models
 
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+
+from .revocation import forget_revocation_state
 
 
 class User(AbstractUser):
@@ -14,8 +19,74 @@ class User(AbstractUser):
         (SUPER_ADMIN, 'super-admin'),
     )
 
+    # tokens embed claims derived from these, changing one revokes the tokens already issued
+    TOKEN_CLAIM_FIELDS = ('role', 'first_name', 'password', 'is_active')
+
     role = models.PositiveSmallIntegerField(choices=ROLE_CHOICES, default=REGULAR)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+
+        user = super().from_db(db, field_names, values)
+        user._token_claim_values = {
+            field: user.__dict__[field] for field in cls.TOKEN_CLAIM_FIELDS if field in user.__dict__}
+
+        return user
+
+    def save(self, *args, **kwargs):
+
+        loaded_values = getattr(self, '_token_claim_values', {})
+        claims_changed = any(self.__dict__.get(field) != value for field, value in loaded_values.items())
+
+        super().save(*args, **kwargs)
+
+        if claims_changed:
+            self.revoke_tokens()
+            self._token_claim_values = {field: self.__dict__.get(field) for field in loaded_values}
+
+    def revoke_tokens(self):
+        """Revokes every token issued to the user so far"""
+
+        TokenRevocation.objects.update_or_create(user_id=self.id, defaults={'revoked_before': timezone.now()})
+        forget_revocation_state(self.id)
+
+    @property
+    def is_admin(self):
+
+        return self.role == User.ADMIN
+
+    @property
+    def is_super_admin(self):
+
+        return self.role == User.SUPER_ADMIN
+
+    def __str__(self):
+
+        return f"<User: {self.first_name}>"
+
+
+class TokenRevocation(models.Model):
+    """Tokens of `user` issued before `revoked_before` are rejected"""
+
+    user = models.OneToOneField('users.User', on_delete=models.CASCADE, primary_key=True,
+                                related_name='token_revocation')
+    revoked_before = models.DateTimeField()
+
+
+class RoleTokenUser(TokenUser):
+    """Stateless user built from the claims of a `RoleRefreshToken`, without a database hit
+
+    Carries what the permissions and tweet queries use: `id`, `role` and the name used in logs.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @cached_property
+    def first_name(self):
+        return self.token.get('first_name', '')
+
     @property
     def is_admin(self):
 
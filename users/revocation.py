@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_revocation_cache_settings():
+
+    return dict({
+        'ALIAS': 'default',
+        'TIMEOUT': 30,
+    }, **getattr(settings, 'JWT_REVOCATION_CACHE', {}))
+
+
+def make_key(user_id):
+    return f"jwt-revocation:{user_id}"
+
+
+def get_revocation_state(user_id):
+    """Returns `(exists, is_active, revoked_before timestamp or None)` for a user
+
+    Read from the database at most once per `JWT_REVOCATION_CACHE['TIMEOUT']` seconds,
+    which bounds how long a revoked token keeps working on other workers.
+    """
+
+    from .models import User
+
+    cache_settings = get_revocation_cache_settings()
+    cache = caches[cache_settings['ALIAS']]
+
+    state = cache.get(make_key(user_id))
+    if state is None:
+        row = User.objects.filter(id=user_id).values_list('is_active', 'token_revocation__revoked_before').first()
+        if row is None:
+            state = (False, False, None)
+        else:
+            is_active, revoked_before = row
+            state = (True, is_active, revoked_before.timestamp() if revoked_before else None)
+        cache.set(make_key(user_id), state, cache_settings['TIMEOUT'])
+
+    return state
+
+
+def forget_revocation_state(user_id):
+    """Drops the cached state, the next request of the user reads it again"""
+
+    cache_settings = get_revocation_cache_settings()
+    caches[cache_settings['ALIAS']].delete(make_key(user_id))
@@ -2,7 +2,9 @@ from django.contrib.auth.models import update_last_login
 from rest_framework import serializers
 from django.db import models
 from django.contrib.auth.hashers import make_password
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import User
+from .tokens import RoleRefreshToken
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -30,3 +32,11 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'first_name', 'last_name', 'email']
+
+
+class TokenObtainPairSerializerCustom(TokenObtainPairSerializer):
+
+    @classmethod
+    def get_token(cls, user):
+
+        return RoleRefreshToken.for_user(user)
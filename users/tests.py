@@ -1,3 +1,87 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from tweets.cache import tweet_cache
+from tweets.models import Tweet
+from .models import User
+from .tokens import RoleRefreshToken
+
+
+class StatelessJWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+
+        cache.clear()
+        tweet_cache.reset()
+        self.user = User.objects.create_user('stateless_user', first_name='stateless')
+        self.tweet = Tweet.create_new_tweet(self.user, 'tweet')
+
+    def authenticate(self, user):
+
+        refresh_token = RoleRefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh_token.access_token}')
+
+    def test_no_user_query(self):
+
+        self.authenticate(self.user)
+        self.client.get(reverse('get_tweet', args=[self.tweet.id]))
+
+        # revocation state and tweet are cached
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('get_tweet', args=[self.tweet.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_token_obtain_claims(self):
+
+        self.user.set_password('stateless_password')
+        self.user.save()
+
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'stateless_user', 'password': 'stateless_password'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+        response = self.client.get(reverse('get_all_tweets'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_permissions(self):
+
+        self.authenticate(self.user)
+        response = self.client.get(reverse('pending_tweet_modification_requests'))
+        self.assertEqual(response.status_code, 403)
+
+        super_admin = User.objects.create_user('stateless_super_admin', role=User.SUPER_ADMIN)
+        self.authenticate(super_admin)
+        response = self.client.get(reverse('pending_tweet_modification_requests'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_change_revokes_tokens(self):
+
+        admin = User.objects.create_user('stateless_admin', role=User.ADMIN)
+        self.authenticate(admin)
+        self.assertEqual(self.client.delete(reverse('new_tweet_delete_request', args=[self.tweet.id])).status_code, 201)
+
+        admin = User.objects.get(id=admin.id)
+        admin.role = User.REGULAR
+        admin.save()
+
+        response = self.client.delete(reverse('new_tweet_delete_request', args=[self.tweet.id]))
+        self.assertEqual(response.status_code, 401)
+
+        # a new token carries the new role
+        self.authenticate(admin)
+        response = self.client.delete(reverse('new_tweet_delete_request', args=[self.tweet.id]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_inactive_and_deleted_users(self):
+
+        self.authenticate(self.user)
+
+        user = User.objects.get(id=self.user.id)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.client.get(reverse('get_all_tweets')).status_code, 401)
+
+        user.delete()
+        cache.clear()
+        self.assertEqual(self.client.get(reverse('get_all_tweets')).status_code, 401)
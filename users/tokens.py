@@ -0,0 +1,21 @@
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class RoleRefreshToken(RefreshToken):
+    """Refresh token carrying the claims `StatelessJWTAuthentication` builds the user from
+
+    Access tokens created from it copy every claim, `iat` included, so revoking the
+    refresh token's issue time also revokes the access tokens refreshed from it.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+
+        token = super().for_user(user)
+        token['role'] = user.role
+        token['first_name'] = user.first_name
+        # sub-second, so that a token issued right after a revocation is not rejected by it
+        token['iat'] = timezone.now().timestamp()
+
+        return token
@@ -2,7 +2,7 @@ from rest_framework import generics, permissions, mixins
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from .serializers import UserSerializer, RegisterSerializer
+from .serializers import UserSerializer, RegisterSerializer, TokenObtainPairSerializerCustom
 import logging
 
 access_log = logging.getLogger("access")
@@ -27,6 +27,8 @@ class Register(generics.GenericAPIView):
 
 class TokenObtainPairViewCustom(TokenObtainPairView):
 
+    serializer_class = TokenObtainPairSerializerCustom
+
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
 